@@ -1,2 +1,4 @@
 def main() -> None:
-    print("Hello from codechallenge2025!")
+    from codechallenge2025.cli import main as cli_main
+
+    cli_main()
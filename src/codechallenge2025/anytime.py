@@ -0,0 +1,99 @@
+# src/codechallenge2025/anytime.py
+"""
+Anytime top-k under a per-query budget.
+
+A query's pre-filter candidates are scored in priority order, most
+shared rare alleles first: a row's priority is the sum over loci of
+-log p of the rarest query allele it carries there. They go in chunks
+that double in size (FIRST_CHUNK rows first), and the top-k is updated
+after every chunk. The scan stops when the query's time budget (counted
+from its start, pre-filter included) or row budget runs out, and the
+query is flagged unfinished; the first chunk is always scored, so there
+is an answer. The rows left unscored are the least promising, so a
+best-so-far top-k is usually the final one.
+"""
+
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from codechallenge2025.encoding import MISSING, GenotypeStore
+from codechallenge2025.index import MAX_MISMATCH, AlleleIndex, SegmentedIndex
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.scoring import TopK, pair_index, score_tile
+from codechallenge2025.stats import NO_STATS, Stats
+
+FIRST_CHUNK = 256  # Rows scored before the first budget check
+
+
+def priority(store: GenotypeStore, model: LikelihoodModel, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Rarity of the query alleles each row shares: sum of -log p per locus"""
+    total = np.zeros(len(rows), dtype=np.float32)
+    for l in np.flatnonzero(query[:, 0] != MISSING):
+        p = model.allele_frequencies(l)
+        a, b = query[l]
+        codes = store.codes[rows, l]
+        has_a = (codes == a).any(axis=1)
+        has_b = (codes == b).any(axis=1)
+        rarest_a = p[a] <= p[b]
+        first, second = (has_a, has_b) if rarest_a else (has_b, has_a)
+        rare, common = -np.log(min(p[a], p[b])), -np.log(max(p[a], p[b]))
+        total += np.where(first, rare, np.where(second, common, 0.0)).astype(np.float32)
+    return total
+
+
+def search_anytime(
+    store: GenotypeStore,
+    index: Union[AlleleIndex, SegmentedIndex],
+    queries: np.ndarray,
+    k: int = 10,
+    budget_ms: Optional[float] = None,
+    budget_rows: Optional[int] = None,
+    max_mismatch: int = MAX_MISMATCH,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+) -> Tuple[TopK, np.ndarray]:
+    """
+    Best-so-far top-k per encoded query within a budget.
+
+    Args:
+        budget_ms: wall-clock time per query (None: unlimited)
+        budget_rows: candidate rows scored per query (None: unlimited)
+        stats: collects prefilter/priority/anytime_score timings and the
+            candidates, rows_unscored and budget_exceeded counters
+
+    Returns:
+        (best, finished): the top-k, and per query whether every candidate
+        was scored (the same top-k search_indexed returns)
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    best = TopK(len(queries), k)
+    finished = np.ones(len(queries), dtype=bool)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        deadline = None if budget_ms is None else start + budget_ms / 1000
+        with stats.stage("prefilter", query=i):
+            rows = index.candidates(query, max_mismatch)
+        stats.count("candidates", len(rows), query=i)
+        with stats.stage("priority", query=i):
+            rows = rows[np.argsort(-priority(store, model, query, rows), kind="stable")]
+            tables = model.locus_tables(queries[i:i + 1])
+        limit = len(rows) if budget_rows is None else min(len(rows), budget_rows)
+        found = TopK(1, k)
+        done, chunk = 0, FIRST_CHUNK
+        with stats.stage("anytime_score", query=i):
+            while done < limit:
+                if deadline is not None and done and time.perf_counter() >= deadline:
+                    break
+                batch = rows[done:min(done + chunk, limit)]
+                found.push(score_tile(tables, pair_index(store, store.codes[batch])), batch)
+                done += len(batch)
+                chunk *= 2
+        if done < len(rows):
+            finished[i] = False
+            stats.count("budget_exceeded", 1, query=i)
+            stats.count("rows_unscored", len(rows) - done, query=i)
+        best.scores[i], best.rows[i] = found.scores[0], found.rows[0]
+    return best, finished
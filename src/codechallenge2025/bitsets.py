@@ -0,0 +1,181 @@
+# src/codechallenge2025/bitsets.py
+"""
+Packed allele-presence bitsets for exclusion counting.
+
+Each locus gets a bit field with one bit per allele code (code c is bit
+c - 1; MISSING sets nothing) followed by a zero guard bit. Fields are
+packed into uint64 words without straddling a word boundary, so a whole
+profile is a few words (three for the generated 21-locus panel). A locus
+with more than PART_ALLELES alleles (SE33 panels, say) is split into
+several parts, each a field of its own, and its per-locus tests OR the
+parts together.
+
+Against one query, a row's locus is consistent when row & query alleles
+is non-zero in its field, mutation-explained when only row & the query's
+±1-step neighbour alleles is, and excluded when both are empty while the
+locus is called on both sides. "Field is non-zero" is tested for every
+field of a word at once: adding the field mask carries into the guard
+bit exactly when the field has a bit set, so
+
+    ((x & low) + low) & guard
+
+leaves one guard bit per non-empty field, and np.bitwise_count counts
+loci per word.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from codechallenge2025.encoding import MISSING, GenotypeStore
+
+WORD_BITS = 64
+PART_ALLELES = WORD_BITS - 1  # Allele bits per field: one bit is the guard
+
+
+class AlleleBitsets:
+    """
+    Bitset matrix of a GenotypeStore.
+
+    Attributes:
+        words: uint64 array (rows, n_words) of allele-presence bits
+        parts: per locus, the (word, shift, width) of each of its fields;
+            code c is in part (c - 1) // PART_ALLELES
+        low: per-word mask of every field bit
+        guard: per-word mask of every guard bit
+        single: per-word mask of the guard bits of single-part loci
+        wide: loci split into several parts
+
+    The layout is fixed when the bitsets are built; query alleles coded
+    later (extending the vocabulary) have no bit, since no row carries them.
+    """
+
+    def __init__(self, store: GenotypeStore, rows: Optional[np.ndarray] = None):
+        self.store = store
+        self.parts: List[List[Tuple[int, int, int]]] = []
+        self.n_words, used = 0, WORD_BITS
+        for values in store.alleles:
+            size = len(values) - 1
+            parts = []
+            for first in range(0, max(size, 1), PART_ALLELES):
+                width = min(PART_ALLELES, size - first)
+                if used + width + 1 > WORD_BITS:
+                    self.n_words, used = self.n_words + 1, 0
+                parts.append((self.n_words - 1, used, width))
+                used += width + 1
+            self.parts.append(parts)
+        self.wide = [l for l, parts in enumerate(self.parts) if len(parts) > 1]
+
+        self.low = np.zeros(self.n_words, dtype=np.uint64)
+        self.guard = np.zeros(self.n_words, dtype=np.uint64)
+        self.single = np.zeros(self.n_words, dtype=np.uint64)
+        for parts in self.parts:
+            for w, s, width in parts:
+                self.low[w] |= np.uint64(((1 << width) - 1) << s)
+                self.guard[w] |= np.uint64(1 << (s + width))
+                if len(parts) == 1:
+                    self.single[w] |= np.uint64(1 << (s + width))
+
+        codes = store.codes if rows is None else store.codes[rows]
+        self.words = np.zeros((len(codes), self.n_words), dtype=np.uint64)
+        for l in range(len(store.loci)):
+            bits, first, second = self.code_bits(l), codes[:, l, 0], codes[:, l, 1]
+            if l not in self.wide:
+                self.words[:, self.parts[l][0][0]] |= bits[first] | bits[second]
+                continue
+            word = self.code_words(l)
+            for w, _, _ in self.parts[l]:
+                for allele in (first, second):
+                    self.words[:, w] |= np.where(word[allele] == w, bits[allele], np.uint64(0))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def code_bits(self, locus_index: int) -> np.ndarray:
+        """uint64 bit of every current allele code at a locus (0 if it has none)"""
+        size = len(self.store.alleles[locus_index])
+        bits = np.zeros(size, dtype=np.uint64)
+        for p, (_, shift, width) in enumerate(self.parts[locus_index]):
+            codes = np.arange(1 + p * PART_ALLELES, min(size, 1 + p * PART_ALLELES + width))
+            bits[codes] = np.uint64(1) << (codes - 1 - p * PART_ALLELES + shift).astype(np.uint64)
+        return bits
+
+    def code_words(self, locus_index: int) -> np.ndarray:
+        """Word holding the bit of every current allele code at a locus"""
+        parts = self.parts[locus_index]
+        size = len(self.store.alleles[locus_index])
+        part = np.minimum(np.maximum(np.arange(size) - 1, 0) // PART_ALLELES, len(parts) - 1)
+        return np.array([w for w, _, _ in parts], dtype=np.intp)[part]
+
+    def fields(self, locus_index: int) -> List[Tuple[int, np.uint64]]:
+        """(word, mask of its allele bits) of every part of a locus"""
+        return [(w, np.uint64(((1 << width) - 1) << s)) for w, s, width in self.parts[locus_index]]
+
+    def query_masks(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (exact, step, called) per-word masks of an encoded query (loci, 2):
+        its allele bits, the bits of alleles ±1 repeat away from them, and
+        the guard bits of its called loci.
+        """
+        exact = np.zeros(self.n_words, dtype=np.uint64)
+        step = np.zeros(self.n_words, dtype=np.uint64)
+        called = np.zeros(self.n_words, dtype=np.uint64)
+        for l in range(len(query)):
+            if query[l, 0] == MISSING:
+                continue
+            bits, word = self.code_bits(l), self.code_words(l)
+            keys = np.rint(self.store.allele_values(l) * 10)
+            near = np.flatnonzero((np.abs(keys[:, None] - keys[query[l]][None, :]) == 10).any(axis=1))
+            np.bitwise_or.at(exact, word[query[l]], bits[query[l]])
+            np.bitwise_or.at(step, word[near], bits[near])
+            for w, s, width in self.parts[l]:
+                called[w] |= np.uint64(1 << (s + width))
+        return exact, step, called
+
+    def _fields(self, x: np.ndarray) -> np.ndarray:
+        """Guard bit set for every non-empty field of x"""
+        return ((x & self.low) + self.low) & self.guard
+
+    def _wide(self, fields: np.ndarray, locus_index: int) -> np.ndarray:
+        """Rows with some part of a wide locus set in fields (from _fields)"""
+        out = np.zeros(len(fields), dtype=bool)
+        for w, s, width in self.parts[locus_index]:
+            out |= (fields[:, w] & np.uint64(1 << (s + width))) != 0
+        return out
+
+    def _count(self, fields: np.ndarray, wide: List[np.ndarray]) -> np.ndarray:
+        """Loci per row: single-part loci from fields, wide loci from their row masks"""
+        return np.bitwise_count(fields & self.single).sum(axis=1).astype(np.int64) + sum(wide, 0)
+
+    def locus_counts(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        (rows, 4) counts of consistent (shared allele), mutated (only a ±1
+        step apart), inconclusive (missing on either side) and excluded loci
+        per row (default: every row).
+        """
+        words = self.words if rows is None else self.words[rows]
+        exact, step, called = self.query_masks(query)
+        hit = self._fields(words & exact)
+        near = self._fields(words & step) & ~hit
+        both = self._fields(words) & called
+        wide_hit = [self._wide(hit, l) for l in self.wide]
+        wide_near = [self._wide(near, l) & ~h for l, h in zip(self.wide, wide_hit)]
+        wide_both = [self._wide(both, l) for l in self.wide]
+        counts = np.empty((len(words), 4), dtype=np.int64)
+        counts[:, 0] = self._count(hit, wide_hit)
+        counts[:, 1] = self._count(near, wide_near)
+        counts[:, 2] = len(query) - self._count(both, wide_both)
+        counts[:, 3] = self._count(
+            both & ~(hit | near),
+            [b & ~h & ~n for b, h, n in zip(wide_both, wide_hit, wide_near)],
+        )
+        return counts
+
+    def exclusions(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Loci per row that neither share an allele nor a ±1 step with the query"""
+        words = self.words if rows is None else self.words[rows]
+        exact, step, called = self.query_masks(query)
+        explained = self._fields(words & (exact | step))
+        both = self._fields(words) & called
+        wide = [self._wide(both, l) & ~self._wide(explained, l) for l in self.wide]
+        return self._count(both & ~explained, wide)
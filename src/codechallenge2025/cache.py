@@ -0,0 +1,255 @@
+# src/codechallenge2025/cache.py
+"""
+Memory-mapped binary cache of an encoded database CSV.
+
+The first load of str_database.csv writes a sidecar directory next to it
+(<csv>.cache/) with one .npy file per array plus a JSON manifest:
+
+    codes.npy          (rows, loci, 2) uint8 allele codes
+    person_ids.npy     fixed-width unicode PersonID table
+    index_*.npy        inverted allele index postings, all loci concatenated
+    overflow_*.npy     side table of calls beyond two alleles (encoding.Overflow)
+    manifest.json      source fingerprint, loci, allele vocabularies
+
+Later loads np.load(..., mmap_mode="r") the arrays, so nothing is parsed
+and pages are only read as scoring touches them. The cache is keyed by
+the CSV's size and mtime; when those change the content hash decides,
+and a different hash rebuilds the cache.
+
+Profiles ingested later (see ingest.py) live in the same directory as
+append-only segments (segments/<name>/, same arrays as the base) plus
+tombstones.npy, the deleted global row numbers (base rows first, then
+each segment in order). Loading overlays them on the base.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.encoding import GenotypeStore, Overflow
+from codechallenge2025.index import AlleleIndex, SegmentedIndex
+from codechallenge2025.stats import NO_STATS, Stats
+
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".cache"
+HASH_CHUNK = 1 << 20
+SEGMENTS_DIR = "segments"
+TOMBSTONES = "tombstones.npy"
+OVERFLOW_ARRAYS = ("rows", "loci", "alleles", "nulls")
+
+
+def cache_dir_for(csv_path: str) -> str:
+    """Sidecar directory holding the cache of a CSV"""
+    return os.path.abspath(csv_path) + CACHE_SUFFIX
+
+
+def content_hash(path: str) -> str:
+    """blake2b digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_manifest(cache_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == CACHE_VERSION else None
+
+
+def _is_fresh(manifest: dict, csv_path: str, cache_dir: str) -> bool:
+    """Cheap size/mtime check first, content hash only when they disagree"""
+    source, current = manifest["source"], _fingerprint(csv_path)
+    if source["size"] != current["size"]:
+        return False
+    if source["mtime_ns"] == current["mtime_ns"]:
+        return True
+    if source["hash"] != content_hash(csv_path):
+        return False
+    # Same bytes, new mtime (e.g. touched or copied): remember the new mtime
+    manifest["source"].update(current)
+    _write_manifest(cache_dir, manifest)
+    return True
+
+
+def _write_manifest(cache_dir: str, manifest: dict):
+    tmp = os.path.join(cache_dir, "manifest.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(cache_dir, "manifest.json"))
+
+
+def database_stamp(cache_dir: str, store: GenotypeStore) -> Optional[dict]:
+    """
+    Version of the cached database a loaded store came from: source hash,
+    live rows, segments, tombstones and vocabulary sizes (None: no cache)
+    """
+    manifest = _read_manifest(cache_dir)
+    if manifest is None:
+        return None
+    tombstones = os.path.join(cache_dir, TOMBSTONES)
+    return {
+        "source": manifest["source"].get("hash"),
+        "rows": len(store),
+        "segments": [entry["name"] for entry in manifest.get("segments", [])],
+        "tombstones": os.stat(tombstones).st_mtime_ns if os.path.exists(tombstones) else None,
+        "sizes": [len(a) for a in store.alleles],
+    }
+
+
+def write_arrays(directory: str, store: GenotypeStore, index: AlleleIndex) -> dict:
+    """Save a store's codes, PersonIDs and index; returns their manifest entries"""
+    np.save(os.path.join(directory, "codes.npy"), np.ascontiguousarray(store.codes))
+    np.save(os.path.join(directory, "person_ids.npy"), np.asarray(store.person_ids).astype(str))
+    np.save(os.path.join(directory, "index_rows.npy"), np.concatenate(index.rows))
+    np.save(os.path.join(directory, "index_other.npy"), np.concatenate(index.other))
+    np.save(os.path.join(directory, "index_offsets.npy"), np.concatenate(index.offsets))
+    for name in OVERFLOW_ARRAYS:
+        np.save(os.path.join(directory, f"overflow_{name}.npy"), getattr(store.overflow, name))
+    return {
+        "rows": len(store),
+        "postings": [len(rows) for rows in index.rows],
+        "offsets": [len(offsets) for offsets in index.offsets],
+    }
+
+
+def write_cache(
+    csv_path: str,
+    store: GenotypeStore,
+    index: AlleleIndex,
+    cache_dir: Optional[str] = None,
+    source: Optional[dict] = None,
+):
+    """
+    Write the store and index of csv_path to its cache directory, replacing
+    any segments and tombstones. source is the CSV fingerprint to record
+    (default: computed from csv_path now).
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    parent = os.path.dirname(cache_dir) or "."
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        manifest = {
+            "version": CACHE_VERSION,
+            "source": source or {**_fingerprint(csv_path), "hash": content_hash(csv_path)},
+            "loci": store.loci,
+            "alleles": [[None] + values[1:] for values in store.alleles],
+            **write_arrays(tmp, store, index),
+            "segments": [],
+        }
+        _write_manifest(tmp, manifest)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp, cache_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def read_arrays(directory: str, entry: dict, loci, alleles) -> Tuple[GenotypeStore, AlleleIndex]:
+    """Memory-map a store and index saved by write_arrays"""
+
+    def load(name):
+        return np.load(os.path.join(directory, name), mmap_mode="r")
+
+    overflow = Overflow(*(np.load(os.path.join(directory, f"overflow_{n}.npy")) for n in OVERFLOW_ARRAYS))
+    store = GenotypeStore.from_arrays(loci, load("person_ids.npy"), load("codes.npy"), alleles, overflow)
+    rows, other, offsets = load("index_rows.npy"), load("index_other.npy"), load("index_offsets.npy")
+    cut_rows = np.cumsum(entry["postings"])[:-1]
+    cut_offsets = np.cumsum(entry["offsets"])[:-1]
+    index = AlleleIndex.from_arrays(
+        len(store),
+        np.split(rows, cut_rows),
+        np.split(other, cut_rows),
+        np.split(offsets, cut_offsets),
+    )
+    return store, index
+
+
+def read_cache(cache_dir: str, manifest: dict) -> Tuple[GenotypeStore, AlleleIndex]:
+    """
+    Memory-map a cache directory written by write_cache. Ingested segments
+    and tombstones are overlaid: the store then holds the live rows only
+    (copied into memory) and the index maps candidates onto them.
+    """
+    alleles = [[np.nan] + values[1:] for values in manifest["alleles"]]
+    store, index = read_arrays(cache_dir, manifest, manifest["loci"], alleles)
+    segments = manifest.get("segments", [])
+    tombstones = read_tombstones(cache_dir)
+    if not segments and not len(tombstones):
+        return store, index
+
+    parts = [(store, index)] + [
+        read_arrays(os.path.join(cache_dir, SEGMENTS_DIR, entry["name"]), entry, manifest["loci"], alleles)
+        for entry in segments
+    ]
+    starts = np.cumsum([0] + [len(part) for part, _ in parts])
+    alive = np.ones(starts[-1], dtype=bool)
+    alive[tombstones] = False
+    index = SegmentedIndex([part for _, part in parts], starts[:-1], alive)
+    overflow = Overflow.concat([part.overflow for part, _ in parts], list(starts[:-1]))
+    live = GenotypeStore.from_arrays(
+        manifest["loci"],
+        np.concatenate([np.asarray(part.person_ids) for part, _ in parts])[alive],
+        np.concatenate([np.asarray(part.codes) for part, _ in parts])[alive],
+        alleles,
+        overflow.remap(index.live_ids),
+    )
+    return live, index
+
+
+def read_tombstones(cache_dir: str) -> np.ndarray:
+    """Deleted global row numbers of a cache (ascending)"""
+    path = os.path.join(cache_dir, TOMBSTONES)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64)
+    return np.load(path)
+
+
+def load_database(
+    csv_path: str,
+    use_cache: bool = True,
+    cache_dir: Optional[str] = None,
+    stats: Optional[Stats] = None,
+) -> Tuple[GenotypeStore, Union[AlleleIndex, SegmentedIndex]]:
+    """
+    Encoded store and allele index of a database CSV, from the binary
+    cache when it is fresh, otherwise parsed from the CSV (and cached).
+    Profiles ingested into a fresh cache are included, deleted ones not.
+    """
+    stats = stats or NO_STATS
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    if use_cache:
+        with stats.stage("cache_read"):
+            manifest = _read_manifest(cache_dir)
+            if manifest is not None and _is_fresh(manifest, csv_path, cache_dir):
+                return read_cache(cache_dir, manifest)
+
+    with stats.stage("csv_parse"):
+        database_df = pd.read_csv(csv_path)
+    with stats.stage("encode"):
+        store = GenotypeStore.from_dataframe(database_df)
+    del database_df
+    with stats.stage("index_build"):
+        index = AlleleIndex(store)
+    if use_cache:
+        try:
+            with stats.stage("cache_write"):
+                write_cache(csv_path, store, index, cache_dir)
+        except OSError as e:
+            print(f"Warning: could not write database cache ({e})")
+    return store, index
@@ -0,0 +1,120 @@
+# src/codechallenge2025/cascade.py
+"""
+Cascade pre-filter: the most discriminating loci first, over a shrinking
+candidate set.
+
+A locus is informative for a query when few random profiles share an
+allele with it: under Hardy-Weinberg a random genotype shares one of the
+query's alleles with probability 1 - (1 - p_a - p_b)^2. Loci are visited
+in increasing order of that probability (decreasing information), each
+one only over the rows still alive, and a row is dropped as soon as it
+fails to share an allele on more than max_mismatch called loci. Rows
+that survive every locus are exactly the ones AlleleIndex.candidates
+keeps with all loci probed, so scoring them gives search_indexed's
+ranking. With neighbours set an allele one repeat away from a query
+allele passes a locus, at up to MAX_STEP_LOCI loci, as with the index's
+neighbour expansion.
+
+Like the index, the cascade is a lossy filter, not an exact search: the
+mismatch count is no bound on the LR, and a dropped row (a homozygote
+sharing no allele still gets a dropout LR near 0.1) can outscore kept
+ones. At max_mismatch=4 the top 10 differs from exhaustive scoring for
+about one query in twenty (tests/tune.py); search_pruned is the exact
+fast path.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from codechallenge2025.bitsets import AlleleBitsets
+from codechallenge2025.encoding import MISSING, GenotypeStore
+from codechallenge2025.index import MAX_MISMATCH, MAX_STEP_LOCI, NEIGHBOURS
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.scoring import TopK, search
+from codechallenge2025.stats import NO_STATS, Stats
+
+COMPACT_RATIO = 0.5  # Compact the live set once this fraction or less survives
+
+
+def locus_order(model: LikelihoodModel, query: np.ndarray) -> np.ndarray:
+    """Called loci of an encoded query (loci, 2), most informative first"""
+    called = np.flatnonzero(query[:, 0] != MISSING)
+    share = np.empty(len(called))
+    for i, l in enumerate(called):
+        p = model.allele_frequencies(l)
+        a, b = query[l]
+        shared = p[a] + (p[b] if b != a else 0.0)
+        share[i] = 1 - (1 - min(shared, 1.0)) ** 2
+    return called[np.argsort(share, kind="stable")]
+
+
+def cascade_candidates(
+    bitsets: AlleleBitsets,
+    query: np.ndarray,
+    order: np.ndarray,
+    max_mismatch: int = MAX_MISMATCH,
+    stats: Optional[Stats] = None,
+    neighbours: bool = NEIGHBOURS,
+) -> np.ndarray:
+    """
+    Ascending row ids sharing an allele with the query (or, with
+    neighbours, a ±1-step neighbour of one) or uncalled on all but
+    max_mismatch of the loci in order.
+    """
+    stats = stats or NO_STATS
+    rows = np.arange(len(bitsets))
+    words = bitsets.words
+    misses = np.zeros(len(rows), dtype=np.int8)
+    stepped = np.zeros(len(rows), dtype=np.int8)
+    exact, step, _ = bitsets.query_masks(query)
+    for depth, l in enumerate(order):
+        stats.count("cascade_rows", len(rows))
+        called = np.zeros(len(rows), dtype=bool)
+        hit = np.zeros(len(rows), dtype=bool)
+        near = np.zeros(len(rows), dtype=bool)
+        for w, field in bitsets.fields(l):
+            column = words[:, w] & field
+            called |= column != 0
+            hit |= (column & exact[w]) != 0
+            if neighbours:
+                near |= (column & step[w]) != 0
+        miss = called & ~hit
+        misses += miss
+        if neighbours:
+            stepped += miss & near
+        if depth < max_mismatch:
+            continue
+        # Dropped rows stay until enough of them pile up to pay for a copy
+        keep = misses - np.minimum(stepped, MAX_STEP_LOCI) <= max_mismatch
+        if np.count_nonzero(keep) <= COMPACT_RATIO * len(rows):
+            rows, words, misses, stepped = rows[keep], words[keep], misses[keep], stepped[keep]
+    return rows[misses - np.minimum(stepped, MAX_STEP_LOCI) <= max_mismatch]
+
+
+def search_cascade(
+    store: GenotypeStore,
+    bitsets: AlleleBitsets,
+    queries: np.ndarray,
+    k: int = 10,
+    max_mismatch: int = MAX_MISMATCH,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+    neighbours: bool = NEIGHBOURS,
+) -> TopK:
+    """
+    Top-k per encoded query, fully scoring only the rows its cascade keeps
+    (lossy: rows the cascade drops are never scored)
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    best = TopK(len(queries), k)
+    for i, query in enumerate(queries):
+        with stats.stage("cascade", query=i):
+            order = locus_order(model, query)
+            rows = cascade_candidates(bitsets, query, order, max_mismatch, stats, neighbours)
+        stats.count("candidates", len(rows), query=i)
+        with stats.stage("full_score", query=i):
+            found = search(store, queries[i:i + 1], k, rows=rows, model=model, stats=stats)
+        best.scores[i], best.rows[i] = found.scores[0], found.rows[0]
+    return best
@@ -0,0 +1,210 @@
+# src/codechallenge2025/cli.py
+"""
+Command line of the codechallenge2025 entry point.
+
+    codechallenge2025 serve --database data/str_database.csv [--port 8765]
+    codechallenge2025 ingest --database data/str_database.csv new_profiles.csv
+    codechallenge2025 delete --database data/str_database.csv P000123 [...]
+    codechallenge2025 compact --database data/str_database.csv
+    codechallenge2025 pairs --database data/str_database.csv --output pairs.csv
+    codechallenge2025 partition --database data/str_database.csv --parts 4 --out data/parts
+    codechallenge2025 worker --database data/parts/part-000.csv [--port 8770]
+    codechallenge2025 cluster --workers host:8770,host:8771 --queries data/str_queries.csv
+"""
+
+import argparse
+import asyncio
+import json
+from typing import List, Optional
+
+import numpy as np
+
+from codechallenge2025.cluster import DEFAULT_WORKER_PORT, WORKER_TIMEOUT
+from codechallenge2025.selfjoin import LOCI_PER_TABLE, MAX_BLOCK, MAX_BUCKET, MAX_FDR
+from codechallenge2025.server import DEFAULT_PORT, MAX_BATCH, WINDOW_MS
+
+
+def serve_command(args: argparse.Namespace):
+    from codechallenge2025.server import serve
+
+    try:
+        asyncio.run(
+            serve(
+                args.database,
+                host=args.host,
+                port=args.port,
+                unix_socket=args.socket,
+                window_ms=args.window_ms,
+                max_batch=args.max_batch,
+                use_cache=not args.no_cache,
+            )
+        )
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+def ingest_command(args: argparse.Namespace):
+    import pandas as pd
+
+    from codechallenge2025.ingest import append_profiles, compact
+
+    for path in args.profiles:
+        profiles_df = pd.read_csv(path)
+        compacting = append_profiles(args.database, profiles_df, auto_compact=not args.compact)
+        print(f"Added {len(profiles_df):,} profiles from {path}")
+        if compacting is not None:
+            print("Compacting in the background...")
+            compacting.join()
+    if args.compact:
+        compact(args.database)
+        print("Compacted.")
+
+
+def delete_command(args: argparse.Namespace):
+    from codechallenge2025.ingest import delete_profiles
+
+    deleted = delete_profiles(args.database, args.person_ids)
+    print(f"Deleted {deleted:,} profiles")
+
+
+def compact_command(args: argparse.Namespace):
+    from codechallenge2025.ingest import compact
+
+    compact(args.database)
+    print("Compacted.")
+
+
+def pairs_command(args: argparse.Namespace):
+    from codechallenge2025.cache import load_database
+    from codechallenge2025.frequencies import estimate_frequencies, load_frequencies
+    from codechallenge2025.likelihood import LikelihoodModel
+    from codechallenge2025.selfjoin import self_join, write_pairs
+
+    store, _ = load_database(args.database, use_cache=not args.no_cache)
+    freqs = estimate_frequencies(store) if args.no_cache else load_frequencies(args.database, store)
+    pairs, scores, expected, report = self_join(
+        store,
+        tables=args.tables,
+        loci_per_table=args.loci_per_table,
+        max_block=args.max_block,
+        max_bucket=args.max_bucket,
+        max_fdr=args.max_fdr,
+        min_log_clr=float(np.log(args.min_clr)),
+        model=LikelihoodModel(store, freqs),
+        seed=args.seed,
+    )
+    write_pairs(args.output, store, pairs, scores, expected)
+    print(
+        f"Wrote {report['reported_pairs']:,} pairs to {args.output} (log CLR >= {report['log_clr_threshold']:.2f}, "
+        f"{report['expected_unrelated']:.3g} unrelated expected)"
+    )
+    share = report["candidate_pairs"] / max(report["all_pairs"], 1)
+    print(
+        f"Scored {report['candidate_pairs']:,} candidate pairs from {report['tables']} tables "
+        f"({share:.4%} of all pairs)"
+    )
+    if report["planted_pairs"]:
+        print(
+            f"Planted P/C pairs: {report['planted_pairs']}, "
+            f"candidate recall {report['candidate_recall']:.1%}, recall {report['recall']:.1%}"
+        )
+
+
+def partition_command(args: argparse.Namespace):
+    from codechallenge2025.cluster import partition_database
+
+    for path in partition_database(args.database, args.parts, args.out):
+        print(f"Wrote {path}")
+
+
+def worker_command(args: argparse.Namespace):
+    from codechallenge2025.cluster import serve_worker
+
+    try:
+        asyncio.run(serve_worker(args.database, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+def cluster_command(args: argparse.Namespace):
+    from codechallenge2025.cluster import Coordinator
+
+    coordinator = Coordinator(args.workers.split(","), timeout=args.timeout, max_batch=args.max_batch)
+    results = coordinator.find_matches(args.queries)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    partial = sum(1 for r in results if r.get("complete") is False)
+    print(f"Wrote {len(results):,} results to {args.output}" + (f" ({partial:,} partial)" if partial else ""))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="codechallenge2025", description="#codechallenge2025 STR matcher")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="keep the database loaded and answer queries over a socket")
+    serve.add_argument("--database", default="data/str_database.csv")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--socket", help="listen on this Unix socket path instead of TCP")
+    serve.add_argument("--window-ms", type=float, default=WINDOW_MS, help="micro-batching window")
+    serve.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    serve.add_argument("--no-cache", action="store_true", help="parse the CSV, skip the binary cache")
+    serve.set_defaults(run=serve_command)
+
+    ingest = commands.add_parser("ingest", help="append profiles from CSV files without a rebuild")
+    ingest.add_argument("profiles", nargs="+", help="CSV files with PersonID + locus columns")
+    ingest.add_argument("--database", default="data/str_database.csv")
+    ingest.add_argument("--compact", action="store_true", help="fold everything into a new base afterwards")
+    ingest.set_defaults(run=ingest_command)
+
+    delete = commands.add_parser("delete", help="tombstone profiles by PersonID")
+    delete.add_argument("person_ids", nargs="+")
+    delete.add_argument("--database", default="data/str_database.csv")
+    delete.set_defaults(run=delete_command)
+
+    compact = commands.add_parser("compact", help="merge ingested segments and deletions into the base cache")
+    compact.add_argument("--database", default="data/str_database.csv")
+    compact.set_defaults(run=compact_command)
+
+    pairs = commands.add_parser("pairs", help="find related pairs within the database (blocked self-join)")
+    pairs.add_argument("--database", default="data/str_database.csv")
+    pairs.add_argument("--output", default="pairs.csv")
+    pairs.add_argument("--tables", type=int, default=None, help="blocking hash tables (default: grows with log rows)")
+    pairs.add_argument(
+        "--loci-per-table", type=int, default=LOCI_PER_TABLE, help="loci a key may run through (default: all)"
+    )
+    pairs.add_argument("--max-block", type=float, default=MAX_BLOCK, help="rows a key's combination may be expected in")
+    pairs.add_argument("--max-bucket", type=int, default=MAX_BUCKET, help="purge larger blocks")
+    pairs.add_argument(
+        "--max-fdr", type=float, default=MAX_FDR, help="expected share of unrelated pairs among those reported"
+    )
+    pairs.add_argument("--min-clr", type=float, default=1e4, help="drop pairs below this CLR while scanning")
+    pairs.add_argument("--seed", type=int, default=0, help="seed of the tables' locus orders")
+    pairs.add_argument("--no-cache", action="store_true", help="parse the CSV, skip the binary cache")
+    pairs.set_defaults(run=pairs_command)
+
+    partition = commands.add_parser("partition", help="split the database into contiguous parts for workers")
+    partition.add_argument("--database", default="data/str_database.csv")
+    partition.add_argument("--parts", type=int, required=True)
+    partition.add_argument("--out", required=True, help="directory of the part CSVs")
+    partition.set_defaults(run=partition_command)
+
+    worker = commands.add_parser("worker", help="serve one database part to a cluster coordinator")
+    worker.add_argument("--database", required=True, help="part CSV this worker owns")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=DEFAULT_WORKER_PORT)
+    worker.set_defaults(run=worker_command)
+
+    cluster = commands.add_parser("cluster", help="match queries across partition workers (scatter-gather)")
+    cluster.add_argument("--workers", required=True, help="comma-separated host:port, in partition order")
+    cluster.add_argument("--queries", default="data/str_queries.csv")
+    cluster.add_argument("--output", default="results.json")
+    cluster.add_argument("--timeout", type=float, default=WORKER_TIMEOUT, help="seconds per worker request")
+    cluster.add_argument("--max-batch", type=int, default=MAX_BATCH, help="queries per request")
+    cluster.set_defaults(run=cluster_command)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
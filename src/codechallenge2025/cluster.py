@@ -0,0 +1,291 @@
+# src/codechallenge2025/cluster.py
+"""
+Scatter-gather matching across worker processes (or nodes).
+
+Each worker owns one partition of the database: its own CSV (see
+partition_database) with its binary cache, index and allele model kept
+warm. It answers JSON-line requests on a TCP port:
+
+    -> {"op": "counts"}
+    <- {"counts": [{"130": 812.0, ...}, ...], "rows": 100000}
+    -> {"op": "frequencies", "frequencies": [{"130": 0.21, ...}, ...]}
+    <- {"ok": true}
+    -> {"op": "match", "profiles": [{"PersonID": "Q001", ...}, ...]}
+    <- {"results": [[candidate dict, ...], ...]}
+
+Alleles travel as keys in tenths of a repeat, since every partition has
+its own vocabulary codes. The coordinator first sums the workers' allele
+counts into frequencies of the whole database and hands them back. Every
+partition then scores with the LR tables a single machine would use. A
+worker whose counts are missing is asked again before every batch and
+not matched meanwhile; once it answers, the frequencies are recomputed
+and sent to every worker again.
+
+Query batches go to all workers at once. The per-partition top-10 lists
+are merged by CLR, with ties in partition order, which for contiguous
+partitions is database order. The global top 10 is always within their
+union. A worker that fails or misses the timeout is left out of that
+batch: its queries' results carry "complete": False and the failure is
+counted.
+"""
+
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.cache import load_database
+from codechallenge2025.encoding import allele_key
+from codechallenge2025.frequencies import allele_counts, frequencies_from_counts
+from codechallenge2025.likelihood import MIN_FREQUENCY, TOP_K, LikelihoodModel
+from codechallenge2025.server import MAX_BATCH, MatchService
+from codechallenge2025.stats import NO_STATS, Stats
+
+WORKER_TIMEOUT = 30.0  # Seconds a worker gets per request
+DEFAULT_WORKER_PORT = 8770
+PARTITION_CHUNK = 100_000  # Rows copied at a time when partitioning
+
+
+class PartitionWorker(MatchService):
+    """
+    MatchService over one partition that scores with allele frequencies
+    of the whole database once the coordinator has sent them. They are
+    kept by allele key and mapped onto the partition's codes again
+    whenever encoding a batch extends its vocabulary.
+    """
+
+    def __init__(self, store, database_path: Optional[str] = None):
+        self.shared: Optional[List[Dict[int, float]]] = None
+        super().__init__(store, database_path=database_path)
+
+    def _model(self) -> LikelihoodModel:
+        if self.shared is None:
+            return super()._model()
+        freqs = []
+        for l, values in enumerate(self.store.alleles):
+            p = np.array([self.shared[l].get(allele_key(v), MIN_FREQUENCY) for v in values[1:]])
+            freqs.append(np.concatenate([[1.0], p]))
+        return LikelihoodModel(self.store, freqs)
+
+    def batch_model(self) -> LikelihoodModel:
+        # Query alleles new to this partition may still be known to the whole database
+        grown = any(len(p) < len(values) for p, values in zip(self.model.frequencies, self.store.alleles))
+        if self.shared is not None and grown:
+            self.model = self._model()
+        return self.model
+
+    def counts(self) -> List[Dict[str, float]]:
+        """Allele counts of the partition by allele key"""
+        return [
+            {str(allele_key(values[code])): float(c[code]) for code in range(1, len(values))}
+            for values, c in zip(self.store.alleles, allele_counts(self.store))
+        ]
+
+    async def answer(self, request: Dict) -> Dict:
+        """Response to one coordinator request"""
+        op = request.get("op")
+        if op == "counts":
+            return {"counts": self.counts(), "rows": len(self.store)}
+        if op == "frequencies":
+            self.shared = [{int(key): p for key, p in table.items()} for table in request["frequencies"]]
+            self.model = self._model()
+            return {"ok": True}
+        if op == "match":
+            loop = asyncio.get_running_loop()
+            return {"results": await loop.run_in_executor(self.executor, self.match_batch, request["profiles"])}
+        raise ValueError(f"unknown op {op!r}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One coordinator connection: a request per line, answered in order"""
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = await self.answer(json.loads(line))
+                except Exception as e:
+                    reply = {"error": str(e)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve_worker(database_path: str, host: str = "127.0.0.1", port: int = DEFAULT_WORKER_PORT):
+    """Load one partition and answer coordinator requests until cancelled"""
+    store, _ = load_database(database_path)
+    worker = PartitionWorker(store, database_path)
+    server = await asyncio.start_server(worker.handle, host, port)
+    print(f"Worker serving {len(store):,} profiles from {database_path} on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker.executor.shutdown(wait=False)
+
+
+def partition_database(database_path: str, parts: int, out_dir: str) -> List[str]:
+    """Split a database CSV into parts contiguous CSVs (part-000.csv, ...) of near-equal size"""
+    with open(database_path, "rb") as f:
+        rows = sum(1 for _ in f) - 1
+    bounds = np.linspace(0, rows, parts + 1).round().astype(int)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, f"part-{i:03d}.csv") for i in range(parts)]
+    part, written = 0, 0
+    for chunk in pd.read_csv(database_path, chunksize=PARTITION_CHUNK, dtype=str, keep_default_na=False):
+        lo = 0
+        while lo < len(chunk):
+            take = min(len(chunk) - lo, bounds[part + 1] - bounds[part] - written)
+            chunk.iloc[lo:lo + take].to_csv(paths[part], mode="a" if written else "w", header=not written, index=False)
+            lo, written = lo + take, written + take
+            if written == bounds[part + 1] - bounds[part] and part < parts - 1:
+                part, written = part + 1, 0
+    return paths
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.strip().rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class Coordinator:
+    """
+    Fans query batches out to partition workers and merges their top-10s.
+
+    Args:
+        workers: "host:port" of every worker, in partition order
+        timeout: seconds a worker gets per request before it is skipped
+        max_batch: queries sent to the workers in one request
+    """
+
+    def __init__(self, workers: Sequence[str], timeout: float = WORKER_TIMEOUT, max_batch: int = MAX_BATCH):
+        self.workers = [parse_address(w) for w in workers]
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self.frequencies: Optional[List[Dict[str, float]]] = None
+        self.tables: List[Optional[List[Dict[str, float]]]] = [None] * len(self.workers)
+        self.configured = [False] * len(self.workers)
+
+    async def _request(self, worker: int, request: Dict) -> Dict:
+        host, port = self.workers[worker]
+
+        async def exchange():
+            reader, writer = await asyncio.open_connection(host, port, limit=1 << 26)
+            try:
+                writer.write(json.dumps(request).encode() + b"\n")
+                await writer.drain()
+                reply = json.loads(await reader.readline())
+            finally:
+                writer.close()
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            return reply
+
+        return await asyncio.wait_for(exchange(), self.timeout)
+
+    async def _fan_out(self, request: Dict, workers: List[int], stats: Stats) -> List[Optional[Dict]]:
+        """Replies of the workers, None where one failed or timed out"""
+        replies = await asyncio.gather(*(self._request(w, request) for w in workers), return_exceptions=True)
+        out = []
+        for w, reply in zip(workers, replies):
+            if isinstance(reply, BaseException):
+                host, port = self.workers[w]
+                kind = "timeout" if isinstance(reply, asyncio.TimeoutError) else "failure"
+                print(f"Warning: worker {host}:{port} {kind} ({reply!r})")
+                stats.count(f"worker_{kind}s", 1)
+                reply = None
+            out.append(reply)
+        return out
+
+    def _frequencies(self) -> List[Dict[str, float]]:
+        """Frequencies by allele key from the counts of every worker counted so far"""
+        tables = [table for table in self.tables if table is not None]
+        frequencies = []
+        for l in range(len(tables[0])):
+            keys = sorted({int(key) for table in tables for key in table[l]})
+            counts = np.zeros(len(keys) + 1)
+            for table in tables:
+                for i, key in enumerate(keys):
+                    counts[i + 1] += table[l].get(str(key), 0.0)
+            p = frequencies_from_counts([counts])[0]
+            frequencies.append({str(key): float(p[i + 1]) for i, key in enumerate(keys)})
+        return frequencies
+
+    async def _configure(self, stats: Stats):
+        """
+        Send whole-database frequencies to the workers that lack them. Workers
+        missing from the counts are asked again; once one answers, the
+        frequencies are recomputed and sent to every worker.
+        """
+        missing = [w for w, table in enumerate(self.tables) if table is None]
+        if missing:
+            replies = await self._fan_out({"op": "counts"}, missing, stats)
+            for w, reply in zip(missing, replies):
+                if reply is not None:
+                    self.tables[w] = reply["counts"]
+            if any(reply is not None for reply in replies):
+                if self.frequencies is not None:
+                    stats.count("frequency_updates", 1)
+                self.frequencies = self._frequencies()
+                self.configured = [False] * len(self.workers)
+        if self.frequencies is None:
+            return
+        # A worker left out of the counts is not matched until it is counted
+        pending = [w for w, done in enumerate(self.configured) if not done and self.tables[w] is not None]
+        if pending:
+            request = {"op": "frequencies", "frequencies": self.frequencies}
+            for w, reply in zip(pending, await self._fan_out(request, pending, stats)):
+                self.configured[w] = reply is not None
+
+    async def match_batch(self, profiles: List[Dict], stats: Stats) -> Tuple[List[List[Dict]], bool]:
+        """Merged top-10 candidate lists of a batch, and whether every partition answered"""
+        await self._configure(stats)
+        ready = [w for w, done in enumerate(self.configured) if done]
+        replies = await self._fan_out({"op": "match", "profiles": profiles}, ready, stats)
+        answered = [r["results"] for r in replies if r is not None]
+        merged = []
+        for i in range(len(profiles)):
+            pooled = [c for results in answered for c in results[i]]
+            # Stable: equal CLRs keep partition order
+            merged.append(sorted(pooled, key=lambda c: -c["clr"])[:TOP_K])
+        return merged, len(answered) == len(self.workers)
+
+    def find_matches(self, queries_path: str, stats: Optional[Stats] = None) -> List[Dict]:
+        """find_matches over the cluster: one result dict per query, in file order"""
+        stats = stats or NO_STATS
+        queries_df = pd.read_csv(queries_path, dtype=str, keep_default_na=False)
+        stats.label_queries(queries_df["PersonID"])
+        profiles = queries_df.to_dict("records")
+
+        async def run():
+            out = []
+            for lo in range(0, len(profiles), self.max_batch):
+                batch = profiles[lo:lo + self.max_batch]
+                with stats.stage("scatter_gather"):
+                    merged, complete = await self.match_batch(batch, stats)
+                if not complete:
+                    stats.count("partial_results", len(batch))
+                for profile, top in zip(batch, merged):
+                    result = {"query_id": profile["PersonID"], "top_candidates": top}
+                    if not complete:
+                        result["complete"] = False
+                    out.append(result)
+            return out
+
+        print(f"Processing {len(profiles)} queries on {len(self.workers)} workers...")
+        results = asyncio.run(run())
+        print("All queries processed.")
+        return results
+
+
+def find_matches(database_path: str, queries_path: str, stats: Optional[Stats] = None) -> List[Dict]:
+    """
+    find_matches with database_path naming a cluster file: the "host:port"
+    of every partition worker, one per line, in partition order
+    """
+    with open(database_path) as f:
+        workers = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return Coordinator(workers).find_matches(queries_path, stats=stats)
@@ -0,0 +1,122 @@
+# src/codechallenge2025/dedup.py
+"""
+Duplicate genotype grouping.
+
+Encoding already canonicalizes profiles: '13' and '13,13' are the same
+homozygote, alleles are stored smallest first and every missing marker
+('-', blank, NaN) is code 0. Rows with equal codes are therefore the
+same genotype, and are grouped by a 64-bit hash of their code bytes
+(verified against the codes; a collision falls back to exact grouping).
+
+Each distinct genotype is scored once; a group's score is fanned back
+out to every row (PersonID) in it.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.scoring import TopK, search
+from codechallenge2025.stats import NO_STATS, Stats
+
+HASH_SEED = np.uint64(0xCBF29CE484222325)
+HASH_PRIME = np.uint64(0x100000001B3)
+
+
+def _padded(codes: np.ndarray) -> np.ndarray:
+    """Code bytes per row, zero-padded to whole uint64 words"""
+    flat = np.asarray(codes).reshape(len(codes), -1)
+    padded = np.zeros((len(flat), -(-flat.shape[1] // 8) * 8), dtype=np.uint8)
+    padded[:, :flat.shape[1]] = flat
+    return padded
+
+
+def genotype_hash(codes: np.ndarray) -> np.ndarray:
+    """uint64 hash of each row's encoded genotype (rows, loci, 2)"""
+    words = _padded(codes).view(np.uint64)
+    h = np.full(len(words), HASH_SEED, dtype=np.uint64)
+    for j in range(words.shape[1]):
+        h = (h ^ words[:, j]) * HASH_PRIME
+        h ^= h >> np.uint64(29)
+    return h
+
+
+class GenotypeGroups:
+    """
+    Rows of a GenotypeStore grouped by identical genotype.
+
+    Attributes:
+        group: (rows,) group id of every row; groups are numbered in order
+            of their first row
+        first: (groups,) first row of every group
+        sizes: (groups,) rows per group
+        distinct: store with one row (the first) per group, sharing the
+            original store's vocabulary
+    """
+
+    def __init__(self, store: GenotypeStore):
+        hashes = genotype_hash(store.codes)
+        _, first, group = np.unique(hashes, return_index=True, return_inverse=True)
+        if not (store.codes == store.codes[first[group]]).all():
+            padded = _padded(store.codes)
+            keys = padded.view(f"V{padded.shape[1]}").ravel()
+            _, first, group = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self.group = rank[group.ravel()]
+        self.first = first[order]
+        self.sizes = np.bincount(self.group, minlength=len(self.first))
+        self._members = np.argsort(self.group, kind="stable")
+        self._offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+        self.distinct = store.with_rows(store.person_ids[self.first], store.codes[self.first])
+
+    def __len__(self) -> int:
+        return len(self.first)
+
+    def members(self, group: int) -> np.ndarray:
+        """Ascending rows of a group"""
+        return self._members[self._offsets[group]:self._offsets[group + 1]]
+
+    def summary(self) -> dict:
+        """Duplicate-group statistics"""
+        dup = self.sizes[self.sizes > 1]
+        return {
+            "rows": int(self.sizes.sum()),
+            "distinct": len(self),
+            "duplicate_groups": len(dup),
+            "duplicate_rows": int(dup.sum() - len(dup)),
+            "largest_group": int(self.sizes.max(initial=0)),
+        }
+
+
+def search_grouped(
+    store: GenotypeStore,
+    groups: GenotypeGroups,
+    queries: np.ndarray,
+    k: int = 10,
+    rows: Optional[np.ndarray] = None,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+) -> TopK:
+    """
+    scoring.search over distinct genotypes: each group among rows (default:
+    all) is scored once, then its score goes to every row of the group.
+    Same top-k as search(store, ...) up to the order of exactly tied rows.
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    distinct = None if rows is None else np.unique(groups.group[rows])
+    found = search(groups.distinct, queries, k, rows=distinct, model=model, stats=stats)
+    best = TopK(len(queries), k)
+    for i, (top, scores) in enumerate(found.results()):
+        members = [groups.members(g) for g in top]
+        if not members:
+            continue
+        expanded = np.concatenate(members)
+        stats.count("rows_fanned_out", len(expanded) - len(top), query=i)
+        expanded_scores = np.repeat(scores, [len(m) for m in members])
+        best.push(expanded_scores[None], expanded, np.array([i]))
+    return best
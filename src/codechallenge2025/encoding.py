@@ -0,0 +1,222 @@
+# src/codechallenge2025/encoding.py
+"""
+Compact integer encoding of STR profiles for #codechallenge2025.
+
+Every locus has its own allele vocabulary. A profile is stored as two uint8
+allele codes per locus (smallest allele first), with code 0 meaning missing.
+Allele strings are parsed once per distinct cell value, never once per row.
+
+Calls that do not fit two codes (more than two distinct alleles, e.g.
+'8,9,10', or a null allele, e.g. '13,N') keep their smallest and largest
+observed alleles in the dense codes and their full call in an Overflow
+side table, so the common two-allele rows stay on the dense path.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MISSING = 0  # Allele code for a missing / undetected allele
+MISSING_TOKENS = ("", "-", "nan", "NaN")
+NULL_TOKENS = ("N", "null")  # A null (non-amplifying) allele within a call
+MAX_ALLELES = 255  # uint8 codes, 0 reserved for MISSING
+
+
+def parse_call(cell) -> Tuple[List[float], int]:
+    """Observed alleles and number of null alleles of one cell ('8,9,10', '13,N')"""
+    if cell is None or (isinstance(cell, float) and np.isnan(cell)):
+        return [], 0
+    text = str(cell).strip()
+    if text in MISSING_TOKENS:
+        return [], 0
+    parts = [part.strip() for part in text.split(",")]
+    nulls = sum(part in NULL_TOKENS for part in parts)
+    return [float(part) for part in parts if part not in MISSING_TOKENS + NULL_TOKENS], nulls
+
+
+def parse_alleles(cell) -> List[float]:
+    """Parse one allele cell ('13,14', '13', '9.3', '-', blank) into floats"""
+    return parse_call(cell)[0]
+
+
+def allele_key(value: float) -> int:
+    """Exact integer key of an allele in tenths of a repeat (9.3 -> 93)"""
+    return int(round(value * 10))
+
+
+class Overflow:
+    """
+    Side table of calls that do not fit the dense two codes, one entry per
+    (row, locus), sorted by row then locus.
+
+    Attributes:
+        rows: (entries,) row of each entry
+        loci: (entries,) locus index of each entry
+        alleles: (entries, width) uint8 codes of every distinct observed
+            allele (by increasing repeat count), padded with MISSING
+        nulls: (entries,) number of null alleles in the call
+    """
+
+    def __init__(self, rows: np.ndarray, loci: np.ndarray, alleles: np.ndarray, nulls: np.ndarray):
+        order = np.lexsort((loci, rows))
+        self.rows = np.asarray(rows, dtype=np.int64)[order]
+        self.loci = np.asarray(loci, dtype=np.int64)[order]
+        self.alleles = np.asarray(alleles, dtype=np.uint8)[order]
+        self.nulls = np.asarray(nulls, dtype=np.uint8)[order]
+
+    @classmethod
+    def empty(cls) -> "Overflow":
+        return cls(np.empty(0), np.empty(0), np.empty((0, 3)), np.empty(0))
+
+    @classmethod
+    def concat(cls, parts: List["Overflow"], offsets: List[int]) -> "Overflow":
+        """Entries of several tables, rows of part i shifted by offsets[i]"""
+        width = max([part.alleles.shape[1] for part in parts], default=3)
+        alleles = [np.pad(part.alleles, ((0, 0), (0, width - part.alleles.shape[1]))) for part in parts]
+        return cls(
+            np.concatenate([part.rows + offset for part, offset in zip(parts, offsets)] + [np.empty(0)]),
+            np.concatenate([part.loci for part in parts] + [np.empty(0)]),
+            np.concatenate(alleles + [np.empty((0, width))]),
+            np.concatenate([part.nulls for part in parts] + [np.empty(0)]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def remap(self, new_rows: np.ndarray) -> "Overflow":
+        """Entries with rows renumbered by new_rows[row] (dropped where -1)"""
+        rows = new_rows[self.rows]
+        keep = rows >= 0
+        return Overflow(rows[keep], self.loci[keep], self.alleles[keep], self.nulls[keep])
+
+    def of_row(self, row: int) -> "Overflow":
+        """Entries of one row, renumbered as row 0"""
+        lo, hi = np.searchsorted(self.rows, [row, row + 1])
+        return Overflow(self.rows[lo:hi] - row, self.loci[lo:hi], self.alleles[lo:hi], self.nulls[lo:hi])
+
+
+class GenotypeStore:
+    """
+    Encoded genotype matrix shared by all queries.
+
+    Attributes:
+        loci: locus names, in column order
+        person_ids: PersonID per row
+        codes: uint8 array of shape (rows, loci, 2), smallest allele first;
+            a single observed allele ('13') is stored as a homozygote (13,13)
+        alleles: per-locus vocabulary, alleles[l][code] is the repeat count
+            (alleles[l][MISSING] is NaN)
+        overflow: full calls of the (row, locus) cells the codes abbreviate
+    """
+
+    def __init__(self, loci: List[str]):
+        self.loci = list(loci)
+        self.person_ids = np.empty(0, dtype=object)
+        self.codes = np.zeros((0, len(self.loci), 2), dtype=np.uint8)
+        self.overflow = Overflow.empty()
+        self.alleles: List[List[float]] = [[np.nan] for _ in self.loci]
+        self._lookup: List[Dict[int, int]] = [{} for _ in self.loci]
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "GenotypeStore":
+        """Encode a database DataFrame (PersonID + one column per locus)"""
+        store = cls([col for col in df.columns if col != "PersonID"])
+        store.person_ids = df["PersonID"].astype(str).to_numpy(dtype=object)
+        store.codes, store.overflow = store.encode_calls(df)
+        return store
+
+    @classmethod
+    def from_arrays(
+        cls,
+        loci: List[str],
+        person_ids: np.ndarray,
+        codes: np.ndarray,
+        alleles: List[List[float]],
+        overflow: Optional[Overflow] = None,
+    ) -> "GenotypeStore":
+        """Rebuild a store from its arrays (e.g. memory-mapped from a cache)"""
+        store = cls(loci)
+        store.person_ids = person_ids
+        store.codes = codes
+        store.overflow = overflow if overflow is not None else Overflow.empty()
+        store.alleles = [list(values) for values in alleles]
+        store._lookup = [
+            {allele_key(v): code for code, v in enumerate(values) if code != MISSING}
+            for values in store.alleles
+        ]
+        return store
+
+    def with_rows(
+        self, person_ids: np.ndarray, codes: np.ndarray, overflow: Optional[Overflow] = None
+    ) -> "GenotypeStore":
+        """A store over other rows sharing this store's (growing) vocabulary"""
+        store = GenotypeStore.__new__(GenotypeStore)
+        store.loci, store.alleles, store._lookup = self.loci, self.alleles, self._lookup
+        store.person_ids, store.codes = person_ids, codes
+        store.overflow = overflow if overflow is not None else Overflow.empty()
+        return store
+
+    def __len__(self) -> int:
+        return len(self.person_ids)
+
+    def allele_code(self, locus_index: int, value: float) -> int:
+        """Code of an allele at a locus, extending the vocabulary if unseen"""
+        key = allele_key(value)
+        lookup = self._lookup[locus_index]
+        code = lookup.get(key)
+        if code is None:
+            code = len(self.alleles[locus_index])
+            if code > MAX_ALLELES:
+                raise ValueError(
+                    f"Too many distinct alleles at locus {self.loci[locus_index]}"
+                )
+            lookup[key] = code
+            self.alleles[locus_index].append(key / 10)
+        return code
+
+    def allele_values(self, locus_index: int) -> np.ndarray:
+        """Repeat count of every code at a locus (NaN for MISSING)"""
+        return np.asarray(self.alleles[locus_index], dtype=np.float64)
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Encode profiles into a (rows, loci, 2) uint8 code array using this
+        store's vocabulary. Unseen alleles extend the vocabulary; existing
+        codes never change. Loci absent from df are encoded as missing.
+        Calls beyond two alleles are abbreviated (see encode_calls).
+        """
+        return self.encode_calls(df)[0]
+
+    def encode_calls(self, df: pd.DataFrame) -> Tuple[np.ndarray, Overflow]:
+        """encode, plus the Overflow table of the calls the codes abbreviate"""
+        codes = np.zeros((len(df), len(self.loci), 2), dtype=np.uint8)
+        entries = []
+        for l, locus in enumerate(self.loci):
+            if locus not in df.columns:
+                continue
+            inverse, uniques = pd.factorize(df[locus], use_na_sentinel=True)
+            # Last row stays (MISSING, MISSING) for the NaN sentinel (-1)
+            table = np.zeros((len(uniques) + 1, 2), dtype=np.uint8)
+            extra: Dict[int, Tuple[List[int], int]] = {}
+            for u, cell in enumerate(uniques):
+                values, nulls = parse_call(cell)
+                values = sorted(set(values))
+                if values:
+                    table[u] = [self.allele_code(l, v) for v in (values[0], values[-1])]
+                    if len(values) > 2 or nulls:
+                        extra[u] = ([self.allele_code(l, v) for v in values], nulls)
+            codes[:, l] = table[inverse]
+            if extra:
+                # Rare cells: their rows are found all at once, never row by row
+                slot = np.full(len(uniques) + 1, -1, dtype=np.intp)
+                slot[list(extra)] = np.arange(len(extra))
+                width = max(len(calls) for calls, _ in extra.values())
+                alleles = np.zeros((len(extra), width), dtype=np.uint8)
+                for i, (calls, _) in enumerate(extra.values()):
+                    alleles[i, :len(calls)] = calls
+                nulls = np.array([n for _, n in extra.values()])
+                hit = np.flatnonzero(slot[inverse] >= 0)
+                which = slot[inverse[hit]]
+                entries.append(Overflow(hit, np.full(len(hit), l), alleles[which], nulls[which]))
+        return codes, Overflow.concat(entries, [0] * len(entries))
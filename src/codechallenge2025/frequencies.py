@@ -0,0 +1,103 @@
+# src/codechallenge2025/frequencies.py
+"""
+Allele frequencies estimated from the database itself.
+
+Every called allele copy of every row is counted in one bincount over
+all loci (a homozygote counts twice). Frequencies below the floor (rare
+or unseen alleles) are raised to it and each locus is renormalized.
+
+The tables are saved next to the binary cache (frequencies.npy plus a
+JSON stamp) and reused while the database they were counted from is
+unchanged: same live row count, segments, tombstones and floor.
+"""
+
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from codechallenge2025.cache import cache_dir_for, database_stamp
+from codechallenge2025.encoding import MISSING, GenotypeStore
+from codechallenge2025.likelihood import MIN_FREQUENCY
+from codechallenge2025.stats import NO_STATS, Stats
+
+FREQUENCY_FILE = "frequencies.npy"
+STAMP_FILE = "frequencies.json"
+
+
+def allele_counts(store: GenotypeStore) -> List[np.ndarray]:
+    """Per-locus count of every allele code over all rows (index MISSING unused)"""
+    sizes = np.array([len(a) for a in store.alleles])
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    codes = np.asarray(store.codes)
+    keys = codes.astype(np.int64) + starts[:-1][None, :, None]
+    counts = np.bincount(keys.ravel(), minlength=starts[-1]).astype(np.float64)
+    return [counts[starts[l]:starts[l + 1]].copy() for l in range(len(store.loci))]
+
+
+def frequencies_from_counts(counts: List[np.ndarray], floor: float = MIN_FREQUENCY) -> List[np.ndarray]:
+    """Floored, renormalized frequencies from allele_counts (possibly summed)"""
+    freqs = []
+    for c in counts:
+        c = np.array(c, dtype=np.float64)
+        c[MISSING] = 0
+        total = c.sum()
+        p = c / total if total else np.full(len(c), floor)
+        p = np.maximum(p, floor)
+        p[1:] /= p[1:].sum()
+        p[MISSING] = 1.0
+        freqs.append(p)
+    return freqs
+
+
+def estimate_frequencies(store: GenotypeStore, floor: float = MIN_FREQUENCY) -> List[np.ndarray]:
+    """Per-locus frequency of every allele code (index MISSING unused)"""
+    return frequencies_from_counts(allele_counts(store), floor)
+
+
+def _stamp(cache_dir: str, store: GenotypeStore, floor: float) -> Optional[dict]:
+    stamp = database_stamp(cache_dir, store)
+    return None if stamp is None else {**stamp, "floor": floor}
+
+
+def load_frequencies(
+    csv_path: str,
+    store: GenotypeStore,
+    floor: float = MIN_FREQUENCY,
+    cache_dir: Optional[str] = None,
+    stats: Optional[Stats] = None,
+) -> List[np.ndarray]:
+    """
+    Frequency tables of the database loaded from csv_path, read from its
+    cache when they were counted from the same rows, otherwise estimated
+    (and saved there when the cache exists).
+    """
+    stats = stats or NO_STATS
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    stamp = _stamp(cache_dir, store, floor)
+    stamp_path = os.path.join(cache_dir, STAMP_FILE)
+    freq_path = os.path.join(cache_dir, FREQUENCY_FILE)
+    if stamp is not None:
+        with stats.stage("frequencies_read"):
+            try:
+                with open(stamp_path) as f:
+                    saved = json.load(f)
+                if saved == stamp:
+                    flat = np.load(freq_path)
+                    return np.split(flat, np.cumsum(stamp["sizes"])[:-1])
+            except (OSError, ValueError):
+                pass
+
+    with stats.stage("frequencies_count"):
+        freqs = estimate_frequencies(store, floor)
+    if stamp is not None:
+        try:
+            np.save(freq_path + ".tmp.npy", np.concatenate(freqs))
+            os.replace(freq_path + ".tmp.npy", freq_path)
+            with open(stamp_path + ".tmp", "w") as f:
+                json.dump(stamp, f)
+            os.replace(stamp_path + ".tmp", stamp_path)
+        except OSError as e:
+            print(f"Warning: could not save allele frequencies ({e})")
+    return freqs
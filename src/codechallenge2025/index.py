@@ -0,0 +1,239 @@
+# src/codechallenge2025/index.py
+"""
+Inverted allele index for candidate pre-filtering.
+
+Postings map (locus, allele code) to the store rows carrying that allele.
+A candidate must share an allele with the query (or be uncalled) on all
+but max_mismatch of the probed loci, where the probed loci are the ones
+at which the query's alleles are rarest. Only candidates get full scoring.
+
+The pre-filter is lossy under the LR model: a row sharing no allele at a
+locus still gets a dropout LR near 0.1 there when the query shows one
+allele, so rows failing more than max_mismatch loci can outscore kept
+ones. It trades exactness for speed on single queries; batched
+exhaustive scoring is the default in find_matches.
+
+With neighbour expansion a row also passes a locus when it carries an
+allele one repeat away from a query allele (9.3 -> 8.3 / 10.3, the
+microvariant suffix kept), so a transmitted allele shifted by a mutation
+is not a mismatch. Each allele has at most two such neighbours, and
+neighbours count at no more than MAX_STEP_LOCI loci per row: mutations
+are rare, while neighbours of common alleles are common.
+"""
+
+from typing import List, Optional, Union
+
+import numpy as np
+
+from codechallenge2025.dedup import GenotypeGroups, search_grouped
+from codechallenge2025.encoding import MISSING, GenotypeStore, allele_key
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.scoring import TopK, search
+from codechallenge2025.stats import NO_STATS, Stats
+
+MAX_MISMATCH = 4  # Probed loci a candidate may fail before it is dropped
+PROBE_LOCI = None  # Number of rarest loci probed per query (None: all called loci)
+NEIGHBOURS = False  # Also probe ±1-step neighbour alleles
+MAX_STEP_LOCI = 1  # Loci at which a neighbour allele may stand in for a shared one
+
+
+class StepNeighbours:
+    """
+    Allele codes one repeat (10 tenths) away from every code, per locus,
+    precomputed from a store's vocabulary and extended when it grows.
+    """
+
+    def __init__(self, store: GenotypeStore):
+        self.store = store
+        self.tables: List[List[np.ndarray]] = [[] for _ in store.loci]
+
+    def codes(self, locus_index: int, code: int) -> np.ndarray:
+        """Codes of the ±1-step neighbours of an allele code (none for MISSING)"""
+        table = self.tables[locus_index]
+        values = self.store.alleles[locus_index]
+        if len(table) != len(values):
+            keys = np.array([allele_key(v) for v in values[1:]])
+            near = np.abs(keys[:, None] - keys[None, :]) == 10
+            table = self.tables[locus_index] = [np.empty(0, dtype=np.intp)]
+            table += [np.flatnonzero(row) + 1 for row in near]
+        return table[code]
+
+    def query(self, query: np.ndarray) -> List[np.ndarray]:
+        """Per-locus neighbour codes of an encoded query (loci, 2)"""
+        return [
+            np.union1d(self.codes(l, a), self.codes(l, b)) if a != MISSING else np.empty(0, dtype=np.intp)
+            for l, (a, b) in enumerate(query)
+        ]
+
+
+class AlleleIndex:
+    """
+    Postings of a GenotypeStore, one CSR block per locus.
+
+    Postings of code c at locus l are rows[l][offsets[l][c]:offsets[l][c + 1]]
+    (ascending row ids); other[l] holds each entry's other allele code, so a
+    heterozygous row is listed once per allele and homozygotes once.
+    The MISSING postings list rows with no call at the locus.
+    """
+
+    def __init__(self, store: GenotypeStore):
+        self.size = len(store)
+        self.rows: List[np.ndarray] = []
+        self.other: List[np.ndarray] = []
+        self.offsets: List[np.ndarray] = []
+        ids = np.arange(len(store), dtype=np.int32)
+        for l in range(len(store.loci)):
+            a, b = store.codes[:, l, 0], store.codes[:, l, 1]
+            het = a != b
+            keys = np.concatenate([a, b[het]])
+            order = np.argsort(keys, kind="stable")
+            counts = np.bincount(keys, minlength=len(store.alleles[l]))
+            self.rows.append(np.concatenate([ids, ids[het]])[order])
+            self.other.append(np.concatenate([b, a[het]])[order])
+            self.offsets.append(np.concatenate([[0], np.cumsum(counts)]))
+
+    @classmethod
+    def from_arrays(
+        cls, size: int, rows: List[np.ndarray], other: List[np.ndarray], offsets: List[np.ndarray]
+    ) -> "AlleleIndex":
+        """Rebuild an index from its per-locus arrays (e.g. memory-mapped)"""
+        index = cls.__new__(cls)
+        index.size, index.rows, index.other, index.offsets = size, rows, other, offsets
+        return index
+
+    def postings(self, locus_index: int, code: int) -> np.ndarray:
+        """Rows carrying an allele code at a locus"""
+        offsets, code = self.offsets[locus_index], int(code)
+        if code + 1 >= len(offsets):
+            return self.rows[locus_index][:0]
+        return self.rows[locus_index][offsets[code]:offsets[code + 1]]
+
+    def locus_hits(self, locus_index: int, query: np.ndarray) -> np.ndarray:
+        """Rows sharing an allele with a called query locus, or uncalled there"""
+        a, b = int(query[0]), int(query[1])
+        hits = [self.postings(locus_index, a), self.postings(locus_index, MISSING)]
+        if b != a:
+            # Rows holding both query alleles are already listed under a
+            offsets = self.offsets[locus_index]
+            if b + 1 < len(offsets):
+                span = slice(offsets[b], offsets[b + 1])
+                hits.append(self.rows[locus_index][span][self.other[locus_index][span] != a])
+        return np.concatenate(hits)
+
+    def step_hits(self, locus_index: int, query: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        """
+        Rows carrying one of the neighbour codes in steps but neither query
+        allele at a called locus, each row once
+        """
+        listed = [int(query[0]), int(query[1])]
+        hits = [self.rows[locus_index][:0]]
+        offsets = self.offsets[locus_index]
+        for code in steps:
+            code = int(code)
+            if code in listed or code + 1 >= len(offsets):
+                continue
+            span = slice(offsets[code], offsets[code + 1])
+            # Rows also holding a query allele or an earlier neighbour are listed elsewhere
+            hits.append(self.rows[locus_index][span][~np.isin(self.other[locus_index][span], listed)])
+            listed.append(code)
+        return np.concatenate(hits)
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        max_mismatch: int = MAX_MISMATCH,
+        probe_loci: Optional[int] = PROBE_LOCI,
+        steps: Optional[List[np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Ascending row ids that survive the pre-filter for one encoded query.
+
+        Args:
+            query: (loci, 2) query codes
+            max_mismatch: probed loci a row may fail (recall-safety knob)
+            probe_loci: how many of the query's rarest loci to probe
+            steps: per-locus neighbour codes (StepNeighbours.query); a row
+                carrying one instead of a query allele passes the locus, at
+                up to MAX_STEP_LOCI loci
+        """
+        called = [l for l in range(len(query)) if query[l, 0] != MISSING]
+        probes = sorted(((self.locus_hits(l, query[l]), l) for l in called), key=lambda p: len(p[0]))
+        if probe_loci is not None:
+            probes = probes[:probe_loci]
+        need = len(probes) - max_mismatch
+        if need <= 0:
+            return np.arange(self.size)
+        counts = np.bincount(np.concatenate([hits for hits, _ in probes]), minlength=self.size)
+        if steps is not None:
+            stepped = [self.step_hits(l, query[l], steps[l]) for _, l in probes]
+            counts += np.minimum(np.bincount(np.concatenate(stepped), minlength=self.size), MAX_STEP_LOCI)
+        return np.flatnonzero(counts >= need)
+
+
+class SegmentedIndex:
+    """
+    Several AlleleIndex segments over consecutive row ranges, minus deleted
+    rows, presented as one index over the live rows.
+
+    Args:
+        parts: segment indexes, in row order
+        starts: global row number of each segment's first row
+        alive: (total rows,) False for deleted (tombstoned) rows
+    """
+
+    def __init__(self, parts: List[AlleleIndex], starts: np.ndarray, alive: np.ndarray):
+        self.parts = parts
+        self.starts = np.asarray(starts)
+        # Global row number -> live row id (-1 when deleted)
+        self.live_ids = np.where(alive, np.cumsum(alive) - 1, -1)
+        self.size = int(np.count_nonzero(alive))
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        max_mismatch: int = MAX_MISMATCH,
+        probe_loci: Optional[int] = PROBE_LOCI,
+        steps: Optional[List[np.ndarray]] = None,
+    ) -> np.ndarray:
+        """Ascending live row ids surviving every segment's pre-filter"""
+        found = [
+            self.live_ids[part.candidates(query, max_mismatch, probe_loci, steps) + start]
+            for part, start in zip(self.parts, self.starts)
+        ]
+        rows = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return rows[rows >= 0]
+
+
+def search_indexed(
+    store: GenotypeStore,
+    index: Union[AlleleIndex, SegmentedIndex],
+    queries: np.ndarray,
+    k: int = 10,
+    max_mismatch: int = MAX_MISMATCH,
+    probe_loci: Optional[int] = PROBE_LOCI,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+    groups: Optional[GenotypeGroups] = None,
+    neighbours: bool = NEIGHBOURS,
+) -> TopK:
+    """
+    Top-k per encoded query, fully scoring only its pre-filter candidates
+    (once per distinct genotype when groups is given, with ±1-step
+    neighbour alleles probed too when neighbours is set)
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    best = TopK(len(queries), k)
+    step_codes = StepNeighbours(store) if neighbours else None
+    for i, query in enumerate(queries):
+        with stats.stage("prefilter", query=i):
+            steps = None if step_codes is None else step_codes.query(query)
+            rows = index.candidates(query, max_mismatch, probe_loci, steps)
+        stats.count("candidates", len(rows), query=i)
+        with stats.stage("full_score", query=i):
+            if groups is None:
+                found = search(store, queries[i:i + 1], k, rows=rows, model=model, stats=stats)
+            else:
+                found = search_grouped(store, groups, queries[i:i + 1], k, rows, model, stats)
+        best.scores[i], best.rows[i] = found.scores[0], found.rows[0]
+    return best
@@ -0,0 +1,170 @@
+# src/codechallenge2025/ingest.py
+"""
+Incremental database updates on top of the binary cache.
+
+append_profiles encodes only the new rows (extending the allele
+vocabulary, whose existing codes never change), builds an index for them
+and saves both as a new segment of the cache; delete_profiles records
+tombstones. Neither touches the base arrays, so the next load_database
+sees the change without re-encoding or re-indexing the database.
+
+Segments and tombstones cost a little on every load (segments are
+overlaid, deleted rows filtered out), so compact() folds everything into
+a new base: one full index build, run on a background thread when
+append_profiles finds more than MAX_SEGMENTS segments or TOMBSTONE_RATIO
+of the rows deleted. Writers hold a lock file next to the cache.
+
+The CSV itself is left alone: it stays the base the cache was built
+from, and if it changes the cache (ingested rows included) is rebuilt.
+"""
+
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.cache import (
+    SEGMENTS_DIR,
+    TOMBSTONES,
+    _read_manifest,
+    _write_manifest,
+    cache_dir_for,
+    load_database,
+    read_arrays,
+    read_tombstones,
+    write_arrays,
+    write_cache,
+)
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.index import AlleleIndex
+
+MAX_SEGMENTS = 8  # Segments tolerated before an automatic compaction
+TOMBSTONE_RATIO = 0.1  # Fraction of deleted rows tolerated before compaction
+
+
+@contextmanager
+def _locked(cache_dir: str):
+    """Exclusive writer lock of a cache directory"""
+    with open(cache_dir + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _open(csv_path: str, cache_dir: Optional[str]):
+    """Cache directory and manifest, building the cache first if it is stale"""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    load_database(csv_path, cache_dir=cache_dir)
+    manifest = _read_manifest(cache_dir)
+    if manifest is None:
+        raise RuntimeError(f"Could not create a database cache in {cache_dir}")
+    return cache_dir, manifest
+
+
+def _total_rows(manifest: dict) -> int:
+    return manifest["rows"] + sum(entry["rows"] for entry in manifest.get("segments", []))
+
+
+def append_profiles(
+    csv_path: str,
+    profiles_df: pd.DataFrame,
+    cache_dir: Optional[str] = None,
+    auto_compact: bool = True,
+) -> Optional[threading.Thread]:
+    """
+    Add profiles (PersonID + locus columns) to the database of csv_path as
+    a new cache segment.
+
+    Returns:
+        the background compaction thread when one was started, else None
+    """
+    cache_dir, _ = _open(csv_path, cache_dir)
+    with _locked(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        alleles = [[np.nan] + values[1:] for values in manifest["alleles"]]
+        codec = GenotypeStore.from_arrays(manifest["loci"], np.empty(0, dtype=object), None, alleles)
+        codes, overflow = codec.encode_calls(profiles_df)
+        segment = codec.with_rows(profiles_df["PersonID"].astype(str).to_numpy(dtype=object), codes, overflow)
+        name = f"seg-{manifest.get('next_segment', 0):06d}"
+        segments_dir = os.path.join(cache_dir, SEGMENTS_DIR)
+        os.makedirs(segments_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=segments_dir)
+        try:
+            entry = {"name": name, **write_arrays(tmp, segment, AlleleIndex(segment))}
+            os.replace(tmp, os.path.join(segments_dir, name))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        manifest["alleles"] = [[None] + values[1:] for values in codec.alleles]
+        manifest["segments"] = manifest.get("segments", []) + [entry]
+        manifest["next_segment"] = manifest.get("next_segment", 0) + 1
+        _write_manifest(cache_dir, manifest)
+    return _maybe_compact(csv_path, cache_dir, manifest) if auto_compact else None
+
+
+def delete_profiles(
+    csv_path: str,
+    person_ids: Iterable[str],
+    cache_dir: Optional[str] = None,
+    auto_compact: bool = True,
+) -> int:
+    """Tombstone every live row with one of the PersonIDs; returns how many"""
+    cache_dir, _ = _open(csv_path, cache_dir)
+    with _locked(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        loci = manifest["loci"]
+        alleles = [[np.nan] + values[1:] for values in manifest["alleles"]]
+        ids = [read_arrays(cache_dir, manifest, loci, alleles)[0].person_ids] + [
+            read_arrays(os.path.join(cache_dir, SEGMENTS_DIR, entry["name"]), entry, loci, alleles)[0].person_ids
+            for entry in manifest.get("segments", [])
+        ]
+        hit = np.flatnonzero(np.isin(np.concatenate(ids), np.asarray(list(person_ids), dtype=str)))
+        tombstones = read_tombstones(cache_dir)
+        new = np.setdiff1d(hit, tombstones)
+        if len(new):
+            path = os.path.join(cache_dir, TOMBSTONES)
+            np.save(path + ".tmp.npy", np.union1d(tombstones, new).astype(np.int64))
+            os.replace(path + ".tmp.npy", path)
+            # Readers watch the manifest for changes
+            manifest["tombstones"] = len(tombstones) + len(new)
+            _write_manifest(cache_dir, manifest)
+    if auto_compact:
+        _maybe_compact(csv_path, cache_dir, manifest)
+    return len(new)
+
+
+def compact(csv_path: str, cache_dir: Optional[str] = None):
+    """Fold segments and tombstones into a new base cache (one full index build)"""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    with _locked(cache_dir):
+        manifest = _read_manifest(cache_dir)
+        if manifest is None:
+            return
+        if not manifest.get("segments") and not len(read_tombstones(cache_dir)):
+            return
+        store, _ = load_database(csv_path, cache_dir=cache_dir)
+        store = GenotypeStore.from_arrays(
+            store.loci,
+            np.asarray(store.person_ids),
+            np.ascontiguousarray(store.codes),
+            store.alleles,
+            store.overflow,
+        )
+        write_cache(csv_path, store, AlleleIndex(store), cache_dir, source=manifest["source"])
+
+
+def _maybe_compact(csv_path: str, cache_dir: str, manifest: dict) -> Optional[threading.Thread]:
+    deleted = len(read_tombstones(cache_dir))
+    if len(manifest.get("segments", [])) <= MAX_SEGMENTS and deleted <= TOMBSTONE_RATIO * _total_rows(manifest):
+        return None
+    thread = threading.Thread(target=compact, args=(csv_path, cache_dir), name="compact-cache")
+    thread.start()
+    return thread
@@ -0,0 +1,183 @@
+# src/codechallenge2025/likelihood.py
+"""
+Per-locus parent-child likelihood ratios as lookup tables.
+
+For a query genotype Q and a candidate genotype C the locus LR is
+P(Q | C is a parent of Q) / P(Q), which under Hardy-Weinberg equilibrium
+is the same whichever of the two is the parent. With t_x the probability
+that C transmits allele x:
+
+    query heterozygous (a, b):  LR = t_a / (2 p_a) + t_b / (2 p_b)
+    query single allele a:      LR = alpha + beta * t_a
+
+The single-allele form mixes a true homozygote with a heterozygote whose
+other allele dropped out (SINGLE_ALLELE_RATE). t_x counts exact
+transmission plus ±1-step mutation (MUTATION_RATE), and a candidate seen
+with a single allele is likewise mixed with a dropped-out heterozygote.
+Missing data gives LR = 1; anything left at 0 is floored at LR_FLOOR.
+
+Each (query, locus) gets a dense table of log LR over every candidate
+genotype pair (a * S + b), so scoring a pair is one gather per locus plus
+a log-domain sum.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from codechallenge2025.bitsets import AlleleBitsets
+from codechallenge2025.dataset_generator import (
+    ALLELE_FREQS,
+    MUTATION_RATE,
+    SINGLE_ALLELE_RATE,
+)
+from codechallenge2025.encoding import MISSING, GenotypeStore, allele_key
+
+MIN_FREQUENCY = 0.001  # Frequency assumed for alleles absent from the table
+LR_FLOOR = 1e-4  # Per-locus LR of an unexplained exclusion
+PRIOR = 0.5  # Prior probability of a parent-child relationship
+IDENTITY_MIN_LOCI = 10  # Loci that must agree before a row counts as the query itself
+TOP_K = 10  # Candidates reported per query
+IDENTITY_SLACK = 5  # Extra rows ranked so duplicates of the query can be dropped
+
+
+def reference_frequencies(store: GenotypeStore) -> List[np.ndarray]:
+    """Per-locus frequency of every allele code from ALLELE_FREQS"""
+    freqs = []
+    for l, locus in enumerate(store.loci):
+        table: Dict[int, float] = {
+            allele_key(a): f for a, f in ALLELE_FREQS.get(locus, {}).items()
+        }
+        p = np.array(
+            [table.get(allele_key(a), MIN_FREQUENCY) for a in store.alleles[l][1:]]
+        )
+        freqs.append(np.concatenate([[1.0], p]))
+    return freqs
+
+
+class LikelihoodModel:
+    """
+    Parent-child LR tables for a GenotypeStore.
+
+    Args:
+        store: encoded database (its vocabulary defines the table layout)
+        frequencies: per-locus allele frequency by code (index MISSING
+            unused); defaults to reference_frequencies(store). Codes added
+            to the vocabulary later fall back to MIN_FREQUENCY.
+    """
+
+    def __init__(self, store: GenotypeStore, frequencies: Optional[List[np.ndarray]] = None):
+        self.store = store
+        self.frequencies = frequencies if frequencies is not None else reference_frequencies(store)
+
+    def allele_frequencies(self, locus_index: int) -> np.ndarray:
+        """Frequencies of every current code at a locus"""
+        p = self.frequencies[locus_index]
+        size = len(self.store.alleles[locus_index])
+        if len(p) < size:
+            p = np.concatenate([p, np.full(size - len(p), MIN_FREQUENCY)])
+        return p[:size]
+
+    def transmission(self, locus_index: int) -> np.ndarray:
+        """(S, S) matrix: [x, c] = P(parent allele c is transmitted as x)"""
+        keys = np.rint(self.store.allele_values(locus_index) * 10)
+        step = np.abs(keys[:, None] - keys[None, :]) == 10
+        f = (1 - MUTATION_RATE) / 2 * np.eye(len(keys)) + MUTATION_RATE / 4 * step
+        f[MISSING, :] = f[:, MISSING] = 0
+        return f
+
+    def locus_lr(self, locus_index: int, queries: np.ndarray) -> np.ndarray:
+        """(Q, S, S) LR of every candidate genotype pair for query codes (Q, 2)"""
+        p = self.allele_frequencies(locus_index)
+        f = self.transmission(locus_index)
+        r = SINGLE_ALLELE_RATE
+        # Chance that a single observed allele hides a second one
+        dropout = r * (1 - p) / (p + r * (1 - p))
+        diag = np.arange(len(p))
+
+        def transmit(x):
+            # (Q, S, S) probability candidate (c1, c2) transmits allele x
+            fx = f[x]
+            t = fx[:, :, None] + fx[:, None, :]
+            t[:, diag, diag] += dropout * (p[x][:, None] / 2 - fx)
+            return t
+
+        qa, qb = queries[:, 0], queries[:, 1]
+        pa, pb = p[qa][:, None, None], p[qb][:, None, None]
+        ta = transmit(qa)
+        het = (qa != qb)[:, None, None]
+        lr_het = ta / (2 * pa) + transmit(qb) / (2 * pb)
+        denom = pa * pa + r * pa * (1 - pa)
+        lr_single = (ta * (pa + r / 2 - r * pa) + r * pa / 2) / denom
+        lr = np.where(het, lr_het, lr_single)
+        lr[qa == MISSING] = 1.0
+        lr[:, MISSING, :] = lr[:, :, MISSING] = 1.0
+        return np.maximum(lr, LR_FLOOR)
+
+    def locus_tables(self, queries: np.ndarray) -> List[np.ndarray]:
+        """
+        Per-locus log LR tables for encoded queries (Q, loci, 2): tables[l]
+        has shape (Q, S * S) and holds the log LR of a candidate genotype
+        (a, b) at index a * S + b.
+        """
+        return [
+            np.log(self.locus_lr(l, queries[:, l])).astype(np.float32).reshape(len(queries), -1)
+            for l in range(len(self.store.loci))
+        ]
+
+
+def locus_counts(store: GenotypeStore, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    (rows, 3) counts of consistent (shared allele), mutated (only a ±1 step
+    apart) and inconclusive (missing on either side) loci per candidate row.
+    """
+    return AlleleBitsets(store, rows).locus_counts(query)[:, :3]
+
+
+def same_person(store: GenotypeStore, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    Rows whose genotype equals the query's at every locus called on both
+    sides (and at least IDENTITY_MIN_LOCI of them): a duplicate of the
+    query individual rather than a relative.
+    """
+    cand = store.codes[rows]
+    called = (cand[:, :, 0] != MISSING) & (query[None, :, 0] != MISSING)
+    equal = (cand == query[None]).all(axis=2) | ~called
+    return equal.all(axis=1) & (called.sum(axis=1) >= IDENTITY_MIN_LOCI)
+
+
+def posterior(clr: float, prior: float = PRIOR) -> float:
+    """Posterior probability of the relationship given the CLR and a prior"""
+    odds = clr * prior / (1 - prior)
+    return odds / (1 + odds) if np.isfinite(odds) else 1.0
+
+
+def top_rows(
+    store: GenotypeStore, query: np.ndarray, rows: np.ndarray, scores: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The first TOP_K of store rows ranked by log CLR against an encoded
+    query (with their scores), skipping rows that are the query itself.
+    """
+    keep = ~same_person(store, query, rows)
+    return rows[keep][:TOP_K], scores[keep][:TOP_K]
+
+
+def candidates(store: GenotypeStore, query: np.ndarray, rows: np.ndarray, scores: np.ndarray) -> List[Dict]:
+    """Candidate dicts of the top_rows of a ranking"""
+    rows, scores = top_rows(store, query, rows, scores)
+    results = []
+    for row, score, (consistent, mutated, inconclusive) in zip(
+        rows, scores, locus_counts(store, query, rows)
+    ):
+        clr = math.exp(float(score))
+        results.append({
+            "person_id": str(store.person_ids[row]),
+            "clr": clr,
+            "posterior": posterior(clr),
+            "consistent_loci": int(consistent),
+            "mutated_loci": int(mutated),
+            "inconclusive_loci": int(inconclusive),
+        })
+    return results
@@ -0,0 +1,153 @@
+# src/codechallenge2025/overflow.py
+"""
+Scoring of calls kept in the Overflow side table (tri-allelic, null alleles).
+
+Every search path scores the dense two codes. Afterwards merge_overflow
+fixes what those codes abbreviate. It works per query and is vectorized
+over the side-table entries:
+
+  - A query with an overflow call gets LR tables rebuilt for its full call
+    at those loci and is rescored over every row.
+  - Database rows with overflow calls are taken out of every top-k and
+    pushed back with exact scores: dense score, with the log LR of each
+    overflow locus replaced.
+
+A parent with alleles M (n of them, nulls included) transmits observed
+allele x with probability t(x) = sum over c in M of P(c -> x) / n, and a
+null with the share of nulls in M. A child showing the items X (distinct
+observed alleles, plus one for a null) has LR = mean over x in X of
+t(x) / p(x). For two alleles this is the dense heterozygote formula; a
+single observed allele keeps the dense model's dropout term.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from codechallenge2025.encoding import MISSING, GenotypeStore, Overflow
+from codechallenge2025.likelihood import LR_FLOOR, SINGLE_ALLELE_RATE, LikelihoodModel
+from codechallenge2025.scoring import TopK, pair_index, score_tile, tile_rows
+from codechallenge2025.stats import NO_STATS, Stats
+
+NULL_FREQUENCY = 0.005  # Population frequency assumed for a null allele
+OVERFLOW_SLACK = 5  # Extra rows ranked so dropped overflow rows leave a full top-k
+
+
+def locus_lr(
+    model: LikelihoodModel,
+    locus_index: int,
+    items: np.ndarray,
+    null_item: bool,
+    alleles: np.ndarray,
+    nulls: np.ndarray,
+) -> np.ndarray:
+    """
+    LR at one locus of a child showing items (observed codes; null_item
+    adds a null) against parents with alleles (E, width) codes (MISSING
+    padded) and nulls (E,)
+    """
+    f = model.transmission(locus_index)
+    p = model.allele_frequencies(locus_index)
+    n = np.maximum(np.count_nonzero(alleles != MISSING, axis=1) + nulls, 1)
+    if len(items) == 1 and not null_item:
+        # A single observed allele may hide a second one, as in the dense model
+        a, r = items[0], SINGLE_ALLELE_RATE
+        t = 2 * f[a][alleles].sum(axis=1) / n
+        lr = (t * (p[a] + r / 2 - r * p[a]) + r * p[a] / 2) / (p[a] * p[a] + r * p[a] * (1 - p[a]))
+    else:
+        lr = np.zeros(len(alleles))
+        for x in items:
+            lr += 2 * f[x][alleles].sum(axis=1) / (n * p[x])
+        if null_item:
+            lr += nulls / (n * NULL_FREQUENCY)
+        lr /= len(items) + null_item
+    lr[(alleles == MISSING).all(axis=1)] = 1.0
+    return np.maximum(lr, LR_FLOOR)
+
+
+def query_items(query: np.ndarray, calls: Overflow, locus_index: int):
+    """(items, null_item) of a query locus, from its full call when it has one"""
+    at = np.flatnonzero(calls.loci == locus_index)
+    if len(at):
+        alleles = calls.alleles[at[0]]
+        return alleles[alleles != MISSING], bool(calls.nulls[at[0]])
+    return np.unique(query[locus_index]), False
+
+
+def query_tables(model: LikelihoodModel, query: np.ndarray, calls: Overflow) -> List[np.ndarray]:
+    """locus_tables of one query (loci, 2), rebuilt at its overflow loci"""
+    tables = model.locus_tables(query[None])
+    for l in np.unique(calls.loci):
+        S = len(model.store.alleles[l])
+        grid = np.stack(np.divmod(np.arange(S * S), S), axis=1).astype(np.intp)
+        # A homozygote code pair (c, c) is the parent (c, c): n = 2
+        lr = locus_lr(model, l, *query_items(query, calls, l), grid, np.zeros(len(grid), dtype=np.intp))
+        lr[(grid == MISSING).any(axis=1)] = 1.0
+        tables[l] = np.log(lr).astype(np.float32)[None]
+    return tables
+
+
+def overflow_scores(
+    store: GenotypeStore,
+    model: LikelihoodModel,
+    tables: List[np.ndarray],
+    query: np.ndarray,
+    calls: Overflow,
+    rows: np.ndarray,
+) -> np.ndarray:
+    """Exact log CLR of the store's overflow rows (ascending, unique) for one query"""
+    scores = score_tile(tables, pair_index(store, store.codes[rows]))[0]
+    entries = store.overflow
+    for l in np.unique(entries.loci):
+        if query[l, 0] == MISSING:
+            continue
+        at = np.flatnonzero(entries.loci == l)
+        pos = np.searchsorted(rows, entries.rows[at])
+        codes = store.codes[entries.rows[at], l]
+        dense = tables[l][0, codes[:, 0].astype(np.intp) * len(store.alleles[l]) + codes[:, 1]]
+        exact = np.log(locus_lr(model, l, *query_items(query, calls, l), entries.alleles[at], entries.nulls[at]))
+        np.add.at(scores, pos, exact.astype(np.float32) - dense)
+    return scores
+
+
+def merge_overflow(
+    store: GenotypeStore,
+    queries: np.ndarray,
+    calls: Overflow,
+    best: TopK,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+) -> TopK:
+    """
+    Correct a dense top-k for overflow calls: queries whose calls (query
+    row numbering) overflow are rescored over every row, and the store's
+    overflow rows enter every top-k with their exact scores.
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    rows = np.unique(store.overflow.rows)
+    if not len(rows) and not len(calls):
+        return best
+    step = tile_rows(len(store.loci), 1)
+    stats.count("overflow_rows", len(rows))
+    for i, query in enumerate(queries):
+        own = calls.of_row(i)
+        with stats.stage("overflow", query=i):
+            found = TopK(1, best.k)
+            if len(own):
+                stats.count("overflow_queries", 1, query=i)
+                tables = query_tables(model, query, own)
+                for lo in range(0, len(store), step):
+                    tile = np.arange(lo, min(lo + step, len(store)))
+                    found.push(score_tile(tables, pair_index(store, store.codes[tile])), tile)
+            else:
+                tables = model.locus_tables(queries[i:i + 1])
+                found.scores[0], found.rows[0] = best.scores[i], best.rows[i]
+            if len(rows):
+                keep = (found.rows[0] >= 0) & ~np.isin(found.rows[0], rows)
+                dense = TopK(1, best.k)
+                dense.push(found.scores[:, keep], found.rows[0, keep])
+                dense.push(overflow_scores(store, model, tables, query, own, rows)[None], rows)
+                found = dense
+        best.scores[i], best.rows[i] = found.scores[0], found.rows[0]
+    return best
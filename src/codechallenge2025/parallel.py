@@ -0,0 +1,102 @@
+# src/codechallenge2025/parallel.py
+"""
+Multi-core sharded matching.
+
+The encoded database is copied once into a multiprocessing.shared_memory
+block. Each worker process attaches to it by name, views a contiguous
+shard of rows without copying, and scores every query against its shard.
+Per-shard top-k lists are merged in shard order; since TopK breaks ties
+by row, the result is identical to a single-process exhaustive search.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.scoring import TopK, search
+from codechallenge2025.stats import NO_STATS, Stats
+
+SHARDS_PER_WORKER = 2  # More shards than workers evens out stragglers
+
+
+def _score_shard(
+    shm_name: str,
+    shape: Tuple[int, ...],
+    lo: int,
+    hi: int,
+    loci: List[str],
+    alleles: List[List[float]],
+    frequencies: List[np.ndarray],
+    queries: np.ndarray,
+    k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker: top-k of rows lo:hi of the shared codes, with global row ids"""
+    shm = SharedMemory(name=shm_name, track=False)
+    try:
+        codes = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)[lo:hi]
+        shard = GenotypeStore.from_arrays(loci, np.empty(hi - lo, dtype=object), codes, alleles)
+        found = search(shard, queries, k, model=LikelihoodModel(shard, frequencies))
+        del codes, shard
+    finally:
+        shm.close()
+    found.rows[found.rows >= 0] += lo
+    return found.scores, found.rows
+
+
+def parallel_search(
+    store: GenotypeStore,
+    queries: np.ndarray,
+    k: int = 10,
+    workers: Optional[int] = None,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+) -> TopK:
+    """
+    Exhaustive top-k per encoded query using worker processes.
+
+    Args:
+        store: encoded database
+        queries: query codes from store.encode
+        k: candidates kept per query
+        workers: worker processes (default: os.cpu_count())
+        model: LR model whose frequencies the workers use
+            (default: LikelihoodModel(store))
+        stats: collects the parallel_score timing and the rows_scanned
+            and pairs_scored counters (per-worker stages are not collected)
+    """
+    stats = stats or NO_STATS
+    workers = workers or os.cpu_count() or 1
+    model = model or LikelihoodModel(store)
+    frequencies = [model.allele_frequencies(l) for l in range(len(store.loci))]
+    n_shards = min(len(store), workers * SHARDS_PER_WORKER) or 1
+    bounds = np.linspace(0, len(store), n_shards + 1).astype(int)
+
+    shm = SharedMemory(create=True, size=max(store.codes.nbytes, 1))
+    try:
+        shared = np.ndarray(store.codes.shape, dtype=np.uint8, buffer=shm.buf)
+        shared[:] = store.codes
+        del shared
+        with stats.stage("parallel_score"), ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _score_shard, shm.name, store.codes.shape, lo, hi,
+                    store.loci, store.alleles, frequencies, queries, k,
+                )
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            best = TopK(len(queries), k)
+            for future in futures:
+                part = TopK(len(queries), k)
+                part.scores, part.rows = future.result()
+                best.merge(part)
+    finally:
+        shm.close()
+        shm.unlink()
+    stats.count("rows_scanned", len(store))
+    stats.count("pairs_scored", len(store) * len(queries))
+    return best
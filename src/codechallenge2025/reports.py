@@ -0,0 +1,242 @@
+# src/codechallenge2025/reports.py
+"""
+Detailed per-locus reports of the final candidates.
+
+Only each query's top-k is explained, after ranking, from the rows
+already encoded. Per locus a report gives:
+
+  - the query and candidate alleles, from the full call where one has an
+    overflow entry
+  - the LR the ranking used
+  - what explains it: a shared allele (with possible dropout when the
+    query shows one allele), a one-step mutation, an exclusion (LR at the
+    floor) or a locus not typed on one side
+  - the allele frequencies behind it
+
+write_reports streams one file per query and format (JSON, CSV, HTML)
+into a directory, building them on a thread pool once the ranking is
+done.
+"""
+
+import csv
+import html
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from codechallenge2025.encoding import MISSING, GenotypeStore, Overflow, allele_key
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.overflow import NULL_FREQUENCY, locus_lr, query_items, query_tables
+from codechallenge2025.stats import NO_STATS, Stats
+
+REPORT_FORMATS = ("json", "csv", "html")
+REPORT_WORKERS = 4  # Threads building and writing report files
+CSV_FIELDS = [
+    "query_id", "rank", "person_id", "clr", "locus",
+    "query_alleles", "candidate_alleles", "lr", "explanation", "frequencies",
+]
+
+
+def allele_text(store: GenotypeStore, locus_index: int, codes: Sequence[int], nulls: int = 0) -> str:
+    """'9.3,12' style call of allele codes (and nulls as N); '-' when empty"""
+    values = sorted(store.alleles[locus_index][c] for c in codes)
+    parts = [f"{v:g}" for v in values] + ["N"] * nulls
+    return ",".join(parts) or "-"
+
+
+def explain(store: GenotypeStore, locus_index: int, query: Tuple[List[int], int], cand: Tuple[List[int], int]) -> str:
+    """Why a locus has its LR, from both sides' (codes, nulls)"""
+    (q, q_nulls), (c, c_nulls) = query, cand
+    if not q and not q_nulls:
+        return "inconclusive: locus not typed in the query"
+    if not c and not c_nulls:
+        return "inconclusive: locus not typed in the candidate"
+    shared = sorted(set(q) & set(c))
+    if shared or (q_nulls and c_nulls):
+        text = f"consistent: shares {allele_text(store, locus_index, shared, int(q_nulls > 0 and c_nulls > 0))}"
+        if len(q) == 1 and not q_nulls:
+            text += " (query shows one allele: homozygous or dropout)"
+        return text
+    values = store.alleles[locus_index]
+    for x in q:
+        for y in c:
+            if abs(allele_key(values[x]) - allele_key(values[y])) == 10:
+                return f"mutation: {values[x]:g} from candidate's {values[y]:g} (one repeat step)"
+    return "exclusion: no shared or one-step allele"
+
+
+def candidate_loci(
+    store: GenotypeStore,
+    model: LikelihoodModel,
+    tables: List[np.ndarray],
+    query: np.ndarray,
+    calls: Overflow,
+    row: int,
+) -> List[Dict]:
+    """Per-locus breakdown of one candidate row for an encoded query (tables from query_tables)"""
+    entries = store.overflow.of_row(row)
+    loci = []
+    for l, locus in enumerate(store.loci):
+        items, null_item = query_items(query, calls, l)
+        q = [int(c) for c in items if c != MISSING] if query[l, 0] != MISSING else []
+        at = np.flatnonzero(entries.loci == l)
+        if len(at):
+            alleles, nulls = entries.alleles[at[0]], int(entries.nulls[at[0]])
+            c = [int(x) for x in alleles if x != MISSING]
+        else:
+            alleles, nulls = None, 0
+            c = sorted({int(x) for x in store.codes[row, l] if x != MISSING})
+        if query[l, 0] == MISSING:
+            lr = 1.0
+        elif alleles is not None:
+            lr = float(locus_lr(model, l, items, null_item, alleles[None], np.array([nulls]))[0])
+        else:
+            a, b = store.codes[row, l]
+            lr = float(np.exp(tables[l][0, int(a) * len(store.alleles[l]) + int(b)]))
+        p = model.allele_frequencies(l)
+        shown = sorted(set(q) | set(c), key=lambda x: store.alleles[l][x])
+        frequencies = {f"{store.alleles[l][x]:g}": float(p[x]) for x in shown}
+        if null_item or nulls:
+            frequencies["N"] = NULL_FREQUENCY
+        loci.append({
+            "locus": locus,
+            "query_alleles": allele_text(store, l, q, int(null_item)),
+            "candidate_alleles": allele_text(store, l, c, nulls),
+            "lr": lr,
+            "explanation": explain(store, l, (q, int(null_item)), (c, nulls)),
+            "frequencies": frequencies,
+        })
+    return loci
+
+
+def query_report(
+    store: GenotypeStore,
+    model: LikelihoodModel,
+    query_id: str,
+    query: np.ndarray,
+    calls: Overflow,
+    top: List[Dict],
+    rows: Sequence[int],
+) -> Dict:
+    """Report of one query: its candidate dicts (store rows) with their per-locus breakdown"""
+    tables = query_tables(model, query, calls)
+    return {
+        "query_id": query_id,
+        "candidates": [
+            {"rank": rank, **candidate, "loci": candidate_loci(store, model, tables, query, calls, row)}
+            for rank, (candidate, row) in enumerate(zip(top, rows), start=1)
+        ],
+    }
+
+
+def write_json(path: str, report: Dict):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def write_csv(path: str, report: Dict):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for cand in report["candidates"]:
+            for locus in cand["loci"]:
+                writer.writerow({
+                    "query_id": report["query_id"],
+                    "rank": cand["rank"],
+                    "person_id": cand["person_id"],
+                    "clr": cand["clr"],
+                    **locus,
+                    "frequencies": ";".join(f"{a}:{p:.4g}" for a, p in locus["frequencies"].items()),
+                })
+
+
+def write_html(path: str, report: Dict):
+    esc = html.escape
+    with open(path, "w") as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{esc(report['query_id'])}</title>\n")
+        f.write("<style>table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:2px 6px}</style>\n")
+        f.write(f"</head><body>\n<h1>Query {esc(report['query_id'])}</h1>\n")
+        for cand in report["candidates"]:
+            f.write(
+                f"<h2>{cand['rank']}. {esc(cand['person_id'])}</h2>\n"
+                f"<p>CLR {cand['clr']:.4g}, posterior {cand['posterior']:.6f}; "
+                f"{cand['consistent_loci']} consistent, {cand['mutated_loci']} mutated, "
+                f"{cand['inconclusive_loci']} inconclusive loci</p>\n"
+                "<table><tr><th>Locus</th><th>Query</th><th>Candidate</th><th>LR</th>"
+                "<th>Explanation</th><th>Frequencies</th></tr>\n"
+            )
+            for locus in cand["loci"]:
+                freqs = ", ".join(f"{a}: {p:.4g}" for a, p in locus["frequencies"].items())
+                f.write(
+                    f"<tr><td>{esc(locus['locus'])}</td><td>{esc(locus['query_alleles'])}</td>"
+                    f"<td>{esc(locus['candidate_alleles'])}</td><td>{locus['lr']:.4g}</td>"
+                    f"<td>{esc(locus['explanation'])}</td><td>{esc(freqs)}</td></tr>\n"
+                )
+            f.write("</table>\n")
+        f.write("</body></html>\n")
+
+
+WRITERS = {"json": write_json, "csv": write_csv, "html": write_html}
+
+
+def write_reports(
+    store: GenotypeStore,
+    model: LikelihoodModel,
+    queries: np.ndarray,
+    calls: Overflow,
+    results: List[Dict],
+    rows: List[Sequence[int]],
+    out_dir: str,
+    formats: Sequence[str] = REPORT_FORMATS,
+    workers: int = REPORT_WORKERS,
+    stats: Optional[Stats] = None,
+) -> List[str]:
+    """
+    Write <query_id>.<format> report files for find_matches results.
+
+    Characters of the query ID other than letters, digits, '_', '.' and
+    '-' become '_'. When that name (ignoring case) is already taken by an
+    earlier result, as for 'Q/1' after 'Q_1' or a repeated ID, the
+    result's index is appended: <name>_<i>.
+
+    Args:
+        queries: the encoded queries of results, in the same order
+        calls: their overflow entries (query row numbering)
+        rows: per result, the store rows of its top_candidates (top_rows)
+        formats: any of "json", "csv", "html"
+
+    Returns:
+        paths of the files written
+    """
+    stats = stats or NO_STATS
+    unknown = set(formats) - set(WRITERS)
+    if unknown:
+        raise ValueError(f"unknown report formats {sorted(unknown)}")
+    os.makedirs(out_dir, exist_ok=True)
+    names, taken = [], set()
+    for i, result in enumerate(results):
+        name = re.sub(r"[^\w.-]", "_", str(result["query_id"]))
+        while name.casefold() in taken:
+            name = f"{name}_{i}"
+        taken.add(name.casefold())
+        names.append(name)
+
+    def write(i: int) -> List[str]:
+        result = results[i]
+        report = query_report(
+            store, model, str(result["query_id"]), queries[i], calls.of_row(i), result["top_candidates"], rows[i]
+        )
+        paths = []
+        for fmt in formats:
+            paths.append(os.path.join(out_dir, f"{names[i]}.{fmt}"))
+            WRITERS[fmt](paths[-1], report)
+        return paths
+
+    with stats.stage("locus_reports"), ThreadPoolExecutor(max_workers=workers) as pool:
+        paths = [path for written in pool.map(write, range(len(results))) for path in written]
+    stats.count("report_files", len(paths))
+    return paths
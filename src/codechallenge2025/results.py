@@ -0,0 +1,148 @@
+# src/codechallenge2025/results.py
+"""
+Persistent cache of query results.
+
+A query's candidate list depends only on its genotype and the database
+it was ranked against, so results are stored under a hash of both:
+
+  - the canonical genotype: per locus, the sorted allele keys in tenths
+    ('13,14' and '14,13' and '14, 13' agree; a missing locus is '-'),
+    from the full call where the query has an overflow entry
+  - the database fingerprint: the cache's database_stamp (source hash,
+    live rows, segments, tombstones, vocabulary) plus the result settings
+
+Each entry also records the stamp alone. Any change to the database
+changes the stamp, and entries of other stamps are dropped when the
+cache is opened; entries of other settings (matching modes) over the
+same database are kept side by side. The entries
+live in an SQLite file in the database's cache directory. A value is
+{"top_candidates": [...], "rows": [...]}: the candidate dicts and their
+store rows, which stay valid while the fingerprint does. Every hit
+refreshes an entry's last use, and least recently used entries go once
+there are more than max_entries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from codechallenge2025.cache import cache_dir_for, database_stamp
+from codechallenge2025.encoding import MISSING, GenotypeStore, Overflow, allele_key
+
+RESULTS_FILE = "results.sqlite"
+MAX_ENTRIES = 100_000  # Cached query results kept at most
+RESULTS_VERSION = 2  # Bump when ranking or the stored values change
+
+
+def genotype_key(store: GenotypeStore, query: np.ndarray, calls: Optional[Overflow] = None) -> str:
+    """
+    Canonical text of an encoded query (loci, 2), independent of codes;
+    calls holds its overflow entries (as row 0), if any
+    """
+    full = {} if calls is None else dict(zip(calls.loci.tolist(), range(len(calls))))
+    parts = []
+    for l, (a, b) in enumerate(query):
+        if a == MISSING:
+            parts.append(f"{store.loci[l]}=-")
+            continue
+        codes = (a, b) if l not in full else [c for c in calls.alleles[full[l]] if c != MISSING]
+        keys = sorted(allele_key(store.alleles[l][c]) for c in codes)
+        nulls = ",N" * (0 if l not in full else int(calls.nulls[full[l]]))
+        parts.append(f"{store.loci[l]}={','.join(map(str, keys))}{nulls}")
+    return ";".join(parts)
+
+
+class ResultCache:
+    """
+    Query results of one database version, persisted across runs.
+
+    Args:
+        path: SQLite file
+        stamp: database version; entries of other versions are dropped
+        fingerprint: database version and result settings the results
+            belong to (part of every key)
+        max_entries: LRU size cap
+    """
+
+    def __init__(self, path: str, stamp: str, fingerprint: str, max_entries: int = MAX_ENTRIES):
+        self.stamp = stamp
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(path, timeout=30)
+        with self.db:
+            columns = [row[1] for row in self.db.execute("PRAGMA table_info(results)")]
+            if columns and "stamp" not in columns:
+                self.db.execute("DROP TABLE results")  # Written before stamps were stored
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, stamp TEXT, fingerprint TEXT, used REAL, value TEXT)"
+            )
+            self.db.execute("DELETE FROM results WHERE stamp != ?", (stamp,))
+
+    @classmethod
+    def for_database(
+        cls, csv_path: str, store: GenotypeStore, settings: dict, max_entries: int = MAX_ENTRIES
+    ) -> Optional["ResultCache"]:
+        """
+        Cache of the database loaded from csv_path as store, for results
+        computed with settings (None when the database has no binary cache)
+        """
+        cache_dir = cache_dir_for(csv_path)
+        stamp = database_stamp(cache_dir, store)
+        if stamp is None:
+            return None
+        database = {"database": stamp, "version": RESULTS_VERSION}
+        stamp_hash = hashlib.blake2b(json.dumps(database, sort_keys=True).encode(), digest_size=16).hexdigest()
+        text = json.dumps({**database, "settings": settings}, sort_keys=True)
+        fingerprint = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        try:
+            return cls(os.path.join(cache_dir, RESULTS_FILE), stamp_hash, fingerprint, max_entries)
+        except sqlite3.Error as e:
+            print(f"Warning: result cache unavailable ({e})")
+            return None
+
+    def key(self, store: GenotypeStore, query: np.ndarray, calls: Optional[Overflow] = None) -> str:
+        """Entry key of an encoded query (with its overflow entries)"""
+        text = f"{self.fingerprint}|{genotype_key(store, query, calls)}"
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        """Stored results of the keys present, refreshing their last use"""
+        found = {}
+        for lo in range(0, len(keys), 500):
+            chunk = keys[lo:lo + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.db.execute(f"SELECT key, value FROM results WHERE key IN ({marks})", chunk)
+            found.update((key, json.loads(value)) for key, value in rows)
+        if found:
+            now = time.time()
+            with self.db:
+                self.db.executemany("UPDATE results SET used = ? WHERE key = ?", [(now, k) for k in found])
+        return found
+
+    def put_many(self, results: Dict[str, Dict]):
+        """Store results, then evict the least recently used beyond max_entries"""
+        if not results:
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                [(key, self.stamp, self.fingerprint, now, json.dumps(value)) for key, value in results.items()],
+            )
+            self.db.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,160 @@
+# src/codechallenge2025/scoring.py
+"""
+Batched scoring of encoded queries against a GenotypeStore.
+
+A block of queries is scored against a tile of database rows in one pass:
+each locus contributes a per-query log LR table (see likelihood.py) indexed
+by the row's genotype pair (a * S + b), so a tile costs one gather per
+locus and query block, and a row's score is its log CLR. Tiles are sized so the score buffer and pair indices stay in cache,
+and every tile is reused by all query blocks before moving on, so the
+database is streamed once per call however many queries there are.
+All work is done on allele codes; no strings are touched here.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.stats import NO_STATS, Stats
+
+QUERY_BLOCK = 32  # Queries scored together against one tile
+CACHE_BYTES = 1 << 20  # Working-set target per tile (score buffer + pair indices)
+MIN_TILE_ROWS = 1024
+TABLE_BYTES = 64 << 20  # Cap on resident lookup tables per database scan
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row indices of the k best scores, best first (ties by row order)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    tied = np.flatnonzero(scores >= kth)
+    return tied[np.lexsort((tied, -scores[tied]))][:k]
+
+
+class TopK:
+    """
+    Running k best (score, row) per query, best first.
+    Ties are broken by lowest row, so the result does not depend on the
+    order in which tiles are pushed.
+    """
+
+    def __init__(self, n_queries: int, k: int = 10):
+        self.k = k
+        self.scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+        self.rows = np.full((n_queries, k), -1, dtype=np.int64)
+
+    def push(self, scores: np.ndarray, rows: np.ndarray, queries: Optional[np.ndarray] = None):
+        """
+        Offer a (len(queries), len(rows)) score tile. queries selects which
+        accumulator rows the tile belongs to (default: all of them).
+        """
+        if queries is None:
+            queries = np.arange(len(self.scores))
+        qi, ci = np.nonzero(scores >= self.scores[queries, -1:])
+        if len(qi):
+            self._keep_best(queries, queries[qi], scores[qi, ci], rows[ci])
+
+    def merge(self, other: "TopK"):
+        """Fold another accumulator over the same queries into this one"""
+        valid = other.rows >= 0
+        qi = np.nonzero(valid)[0]
+        if len(qi):
+            self._keep_best(np.arange(len(self.scores)), qi, other.scores[valid], other.rows[valid])
+
+    def _keep_best(self, queries: np.ndarray, q_new: np.ndarray, s_new: np.ndarray, r_new: np.ndarray):
+        q_all = np.concatenate([np.repeat(queries, self.k), q_new])
+        s_all = np.concatenate([self.scores[queries].ravel(), s_new])
+        r_all = np.concatenate([self.rows[queries].ravel(), r_new])
+        order = np.lexsort((r_all, -s_all, q_all))
+        q_sorted = q_all[order]
+        rank = np.arange(len(order)) - np.searchsorted(q_sorted, q_sorted)
+        keep = rank < self.k
+        self.scores[q_sorted[keep], rank[keep]] = s_all[order][keep]
+        self.rows[q_sorted[keep], rank[keep]] = r_all[order][keep]
+
+    def results(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(rows, scores) per query, best first, padding removed"""
+        out = []
+        for rows, scores in zip(self.rows, self.scores):
+            valid = rows >= 0
+            out.append((rows[valid], scores[valid]))
+        return out
+
+
+def pair_index(store: GenotypeStore, codes: np.ndarray) -> np.ndarray:
+    """(loci, rows) index of each row's genotype into its locus table"""
+    sizes = np.array([len(a) for a in store.alleles], dtype=np.intp)
+    return (codes[:, :, 0].T.astype(np.intp) * sizes[:, None]) + codes[:, :, 1].T
+
+
+def tile_rows(n_loci: int, query_block: int = QUERY_BLOCK) -> int:
+    """Rows per tile so one query block's scores and the pair indices fit CACHE_BYTES"""
+    per_row = 4 * query_block + np.dtype(np.intp).itemsize * n_loci
+    return max(MIN_TILE_ROWS, CACHE_BYTES // per_row)
+
+
+def score_tile(tables: List[np.ndarray], index: np.ndarray) -> np.ndarray:
+    """(Q, rows) scores of one tile from its pair index"""
+    scores = tables[0][:, index[0]]
+    for l in range(1, len(tables)):
+        scores += tables[l][:, index[l]]
+    return scores
+
+
+def search(
+    store: GenotypeStore,
+    queries: np.ndarray,
+    k: int = 10,
+    rows: Optional[np.ndarray] = None,
+    model: Optional[LikelihoodModel] = None,
+    stats: Optional[Stats] = None,
+) -> TopK:
+    """
+    Top-k rows of the store by log CLR for every encoded query (Q, loci, 2).
+
+    Args:
+        store: encoded database
+        queries: query codes from store.encode
+        k: candidates kept per query
+        rows: restrict the scan to these row ids (default: every row)
+        model: LR tables to score with (default: LikelihoodModel(store))
+        stats: collects tables/score/select timings and the rows_scanned
+            and pairs_scored counters
+    """
+    model = model or LikelihoodModel(store)
+    stats = stats or NO_STATS
+    best = TopK(len(queries), k)
+    n_rows = len(store) if rows is None else len(rows)
+    step = tile_rows(len(store.loci), min(QUERY_BLOCK, max(len(queries), 1)))
+
+    # Tables for as many queries as fit TABLE_BYTES stay resident for one scan
+    table_bytes = 4 * sum(len(a) ** 2 for a in store.alleles)
+    resident = max(QUERY_BLOCK, TABLE_BYTES // max(table_bytes, 1))
+    for first in range(0, len(queries), resident):
+        blocks = []
+        for start in range(first, min(first + resident, len(queries)), QUERY_BLOCK):
+            ids = np.arange(start, min(start + QUERY_BLOCK, len(queries)))
+            with stats.stage("tables"):
+                blocks.append((ids, model.locus_tables(queries[ids])))
+
+        for lo in range(0, n_rows, step):
+            hi = min(lo + step, n_rows)
+            if rows is None:
+                tile, codes = np.arange(lo, hi), store.codes[lo:hi]
+            else:
+                tile = rows[lo:hi]
+                codes = store.codes[tile]
+            stats.count("rows_scanned", hi - lo)
+            with stats.stage("score"):
+                index = pair_index(store, codes)
+            for ids, tables in blocks:
+                with stats.stage("score"):
+                    scores = score_tile(tables, index)
+                with stats.stage("select"):
+                    best.push(scores, tile, ids)
+                stats.count("pairs_scored", (hi - lo) * len(ids))
+    return best
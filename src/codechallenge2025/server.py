@@ -0,0 +1,245 @@
+# src/codechallenge2025/server.py
+"""
+Resident matching service.
+
+The database and allele model are loaded once (through the binary cache)
+and stay warm. Clients send query profiles as JSON lines over TCP or a
+Unix socket:
+
+    -> {"PersonID": "Q001", "TH01": "9,9.3", ...}
+    <- {"query_id": "Q001", "top_candidates": [...]}
+
+Queries arriving within window_ms of each other (up to max_batch) are
+coalesced into one batched scoring pass, run on a worker thread so the
+event loop keeps accepting. Rankings are exhaustive, so every response
+holds the same candidate dicts match_single returns for that profile.
+A malformed line, or a profile that fails to encode or score, gets
+{"error": "..."} back and the connection stays open; the rest of its
+batch is answered as usual.
+Profiles ingested or deleted meanwhile (ingest.py) are picked up before
+the next batch: the cache manifest is checked once per batch.
+"""
+
+import asyncio
+import json
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from codechallenge2025.cache import cache_dir_for, load_database
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.frequencies import estimate_frequencies, load_frequencies
+from codechallenge2025.likelihood import IDENTITY_SLACK, TOP_K, LikelihoodModel, candidates
+from codechallenge2025.overflow import OVERFLOW_SLACK, merge_overflow
+from codechallenge2025.scoring import search
+
+WINDOW_MS = 5.0  # How long the first query of a batch waits for company
+MAX_BATCH = 256  # Queries scored in one pass at most
+DEFAULT_PORT = 8765
+
+
+class MatchService:
+    """
+    Warm store + micro-batching front end.
+
+    Args:
+        store: encoded database
+        window_ms: coalescing window after the first query of a batch
+        max_batch: queries per scoring pass at most
+        database_path: CSV the store was loaded from; when given, the store
+            is reloaded whenever its cache manifest changes
+    """
+
+    def __init__(
+        self,
+        store: GenotypeStore,
+        window_ms: float = WINDOW_MS,
+        max_batch: int = MAX_BATCH,
+        database_path: Optional[str] = None,
+    ):
+        self.store = store
+        self.database_path = database_path
+        self.model = self._model()
+        self.loaded_version = self._cache_version()
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.pending: "asyncio.Queue[Tuple[Dict, asyncio.Future]]" = asyncio.Queue()
+        # One scoring thread: encoding may extend the shared vocabulary
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.queries = 0
+
+    def _model(self) -> LikelihoodModel:
+        """LR model with the database's own allele frequencies"""
+        if self.database_path is None:
+            return LikelihoodModel(self.store, estimate_frequencies(self.store))
+        return LikelihoodModel(self.store, load_frequencies(self.database_path, self.store))
+
+    def _cache_version(self) -> Optional[Tuple[int, int]]:
+        if self.database_path is None:
+            return None
+        paths = [os.path.join(cache_dir_for(self.database_path), "manifest.json"), self.database_path]
+        try:
+            return tuple(os.stat(path).st_mtime_ns for path in paths)
+        except OSError:
+            return None
+
+    def refresh(self):
+        """Reload the store if the database or its cache changed since loading"""
+        version = self._cache_version()
+        if version != self.loaded_version:
+            self.store, _ = load_database(self.database_path)
+            self.model = self._model()
+            self.loaded_version = self._cache_version()
+
+    def batch_model(self) -> LikelihoodModel:
+        """LR model for a batch whose queries are encoded (the vocabulary may have grown)"""
+        return self.model
+
+    def match_batch(self, profiles: List[Dict]) -> List[List[Dict]]:
+        """Candidate lists for a batch of query profiles, in one pass"""
+        self.refresh()
+        queries, calls = self.store.encode_calls(pd.DataFrame(profiles))
+        model = self.batch_model()
+        k = TOP_K + IDENTITY_SLACK + (OVERFLOW_SLACK if len(self.store.overflow) else 0)
+        best = search(self.store, queries, k=k, model=model)
+        ranked = merge_overflow(self.store, queries, calls, best, model).results()
+        return [
+            candidates(self.store, query, rows, scores)
+            for query, (rows, scores) in zip(queries, ranked)
+        ]
+
+    def match_each(self, profiles: List[Dict]) -> List[Union[List[Dict], Exception]]:
+        """match_batch one profile at a time, a failing profile's exception in place of its list"""
+        results: List[Union[List[Dict], Exception]] = []
+        for profile in profiles:
+            try:
+                results.append(self.match_batch([profile])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def match(self, profile: Dict) -> List[Dict]:
+        """Candidate list of one profile, scored with whatever arrives alongside it"""
+        future = asyncio.get_running_loop().create_future()
+        await self.pending.put((profile, future))
+        return await future
+
+    async def run_batches(self):
+        """Collect queries into batches and score them, forever"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.pending.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            profiles = [profile for profile, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.match_batch, profiles)
+            except Exception:
+                # One bad profile fails the whole pass: rescore one at a time so only it errors
+                results = await loop.run_in_executor(self.executor, self.match_each, profiles)
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def respond(self, line: bytes) -> Dict:
+        """Response to one request line"""
+        try:
+            profile = json.loads(line)
+            if not isinstance(profile, dict):
+                raise ValueError("expected a JSON object")
+            return {"query_id": profile.get("PersonID"), "top_candidates": await self.match(profile)}
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        One client connection: a JSON profile per line in, a JSON result per
+        line out, in request order. Lines are answered concurrently, so a
+        client pipelining many queries gets them batched together.
+        """
+        replies: "asyncio.Queue[Optional[asyncio.Task]]" = asyncio.Queue()
+
+        async def send():
+            while (reply := await replies.get()) is not None:
+                writer.write(json.dumps(await reply).encode() + b"\n")
+                await writer.drain()
+
+        sender = asyncio.create_task(send())
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    replies.put_nowait(asyncio.create_task(self.respond(line)))
+        except ConnectionError:
+            pass
+        finally:
+            replies.put_nowait(None)
+            try:
+                await sender
+            except ConnectionError:
+                pass
+            writer.close()
+
+
+async def serve(
+    database_path: str,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    unix_socket: Optional[str] = None,
+    window_ms: float = WINDOW_MS,
+    max_batch: int = MAX_BATCH,
+    use_cache: bool = True,
+):
+    """Load the database once and serve queries until cancelled"""
+    print(f"Loading database {database_path}...")
+    store, _ = load_database(database_path, use_cache=use_cache)
+    service = MatchService(store, window_ms, max_batch, database_path if use_cache else None)
+    if unix_socket:
+        server = await asyncio.start_unix_server(service.handle, path=unix_socket)
+        where = unix_socket
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where = f"{host}:{port}"
+    print(f"Serving {len(store):,} profiles on {where}")
+    batcher = asyncio.create_task(service.run_batches())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher.cancel()
+        service.executor.shutdown(wait=False)
+
+
+def query_service(
+    profiles: List[Dict],
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    unix_socket: Optional[str] = None,
+) -> List[Dict]:
+    """Blocking client: send profiles over one connection, return their results in order"""
+    if unix_socket:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(unix_socket)
+    else:
+        conn = socket.create_connection((host, port))
+    with conn, conn.makefile("rwb") as stream:
+        for profile in profiles:
+            stream.write(json.dumps(profile).encode() + b"\n")
+        stream.flush()
+        return [json.loads(stream.readline()) for _ in profiles]
@@ -0,0 +1,104 @@
+# src/codechallenge2025/stats.py
+"""
+Low-overhead hot-path instrumentation: stage timers and counters, overall
+and per query.
+
+Functions take an optional stats argument; None means NO_STATS, whose
+methods do nothing, so disabled instrumentation costs one no-op call per
+stage (never per row). Timers wrap whole stages or tiles, never rows.
+"""
+
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence
+
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("stats", "name", "query", "start")
+
+    def __init__(self, stats: "Stats", name: str, query: Optional[int]):
+        self.stats, self.name, self.query = stats, name, query
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start, self.query)
+
+
+class Stats:
+    """
+    Collected timings (seconds per stage) and counters.
+
+    Counters used by the matcher: rows_scanned (database rows streamed
+    through the scorer), candidates (rows surviving the pre-filter) and
+    pairs_scored (query-row pairs fully scored).
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.per_query: Dict[int, Dict[str, float]] = {}
+        self.query_ids: Optional[Sequence[str]] = None
+
+    def label_queries(self, query_ids: Sequence[str]):
+        """Name per-query records (keyed by query position) in to_dict"""
+        self.query_ids = list(query_ids)
+
+    def stage(self, name: str, query: Optional[int] = None):
+        """Context manager adding its wall time to a stage"""
+        return _Timer(self, name, query)
+
+    def add_time(self, name: str, seconds: float, query: Optional[int] = None):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        if query is not None:
+            record = self.per_query.setdefault(query, {})
+            record[f"{name}_s"] = record.get(f"{name}_s", 0.0) + seconds
+
+    def count(self, name: str, n: int = 1, query: Optional[int] = None):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+        if query is not None:
+            record = self.per_query.setdefault(query, {})
+            record[name] = record.get(name, 0) + int(n)
+
+    def to_dict(self) -> dict:
+        """JSON-ready summary; per-query records keyed by query id if labelled"""
+        query_ids = self.query_ids
+        label = (lambda q: str(query_ids[q])) if query_ids is not None else str
+        return {
+            "seconds": {k: round(v, 6) for k, v in self.seconds.items()},
+            "counters": dict(self.counters),
+            "per_query": {label(q): record for q, record in sorted(self.per_query.items())},
+        }
+
+    def lines(self) -> List[str]:
+        """key=value lines in the test_results.txt format"""
+        out = [f"stage_{k}={v:.4f}" for k, v in self.seconds.items()]
+        out += [f"count_{k}={v}" for k, v in self.counters.items()]
+        return out
+
+
+class NullStats(Stats):
+    """Instrumentation turned off: every call is a no-op"""
+
+    enabled = False
+
+    def stage(self, name: str, query: Optional[int] = None):
+        return _NULL_TIMER
+
+    def add_time(self, name: str, seconds: float, query: Optional[int] = None):
+        pass
+
+    def count(self, name: str, n: int = 1, query: Optional[int] = None):
+        pass
+
+    def label_queries(self, query_ids: Sequence[str]):
+        pass
+
+
+NO_STATS = NullStats()
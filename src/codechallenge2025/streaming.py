@@ -0,0 +1,131 @@
+# src/codechallenge2025/streaming.py
+"""
+Out-of-core matching with bounded memory.
+
+The database CSV is read in fixed-size chunks; each chunk is encoded with
+a vocabulary shared with the queries, scored against every query in one
+batched pass and then dropped. Only the running top-k per query survives,
+together with the PersonIDs, codes and overflow entries of the rows it
+references, so peak memory depends on the chunk size, not on the number
+of profiles. Tri-allelic and null calls are kept as in the in-memory
+path: each chunk is encoded with its Overflow table and its dense top-k
+corrected by merge_overflow before it is folded in, so rows and queries
+with such calls are ranked by their exact scores.
+
+Allele frequencies come from the database, as in the in-memory path: a
+first pass over the chunks only counts alleles (allele_counts per chunk,
+summed), then the scoring pass uses one model built from those counts.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.encoding import GenotypeStore, Overflow
+from codechallenge2025.frequencies import allele_counts, frequencies_from_counts
+from codechallenge2025.likelihood import LikelihoodModel
+from codechallenge2025.overflow import OVERFLOW_SLACK, merge_overflow
+from codechallenge2025.scoring import TopK, search
+from codechallenge2025.stats import NO_STATS, Stats
+
+CHUNK_ROWS = 50_000  # Database rows parsed and scored at a time
+
+
+def _entries(overflow: Overflow, keep: np.ndarray) -> Overflow:
+    """Entries of an Overflow table selected by a boolean mask, rows unchanged"""
+    return Overflow(overflow.rows[keep], overflow.loci[keep], overflow.alleles[keep], overflow.nulls[keep])
+
+
+def stream_frequencies(
+    database_path: str,
+    codec: GenotypeStore,
+    chunk_rows: int = CHUNK_ROWS,
+    stats: Optional[Stats] = None,
+) -> List[np.ndarray]:
+    """
+    Allele frequencies of a database CSV counted chunk by chunk (extending
+    codec's vocabulary): estimate_frequencies of the whole database.
+    """
+    stats = stats or NO_STATS
+    counts = [np.zeros(len(values)) for values in codec.alleles]
+    reader = pd.read_csv(database_path, chunksize=chunk_rows)
+    while True:
+        with stats.stage("csv_parse"):
+            chunk_df = next(reader, None)
+        if chunk_df is None:
+            break
+        with stats.stage("frequencies_count"):
+            chunk = codec.with_rows(chunk_df["PersonID"].to_numpy(dtype=object), codec.encode(chunk_df))
+            for l, c in enumerate(allele_counts(chunk)):
+                counts[l] = np.pad(counts[l], (0, len(c) - len(counts[l]))) + c
+    return frequencies_from_counts(counts)
+
+
+def stream_search(
+    database_path: str,
+    queries_df: pd.DataFrame,
+    k: int = 10,
+    chunk_rows: int = CHUNK_ROWS,
+    stats: Optional[Stats] = None,
+) -> Tuple[GenotypeStore, np.ndarray, Overflow, TopK, LikelihoodModel]:
+    """
+    Top-k database rows per query, reading the database chunk by chunk
+    (twice: allele counts first, then scoring).
+
+    Returns:
+        (pool, queries, calls, best, model): pool is a store holding only
+        the rows that made some query's top-k (with their overflow
+        entries), queries and calls the encoded queries and their overflow
+        entries, best the ranking with rows indexing into pool, and model
+        the LR model it was scored with.
+    """
+    stats = stats or NO_STATS
+    loci = [col for col in pd.read_csv(database_path, nrows=0).columns if col != "PersonID"]
+    codec = GenotypeStore(loci)
+    model = LikelihoodModel(codec, stream_frequencies(database_path, codec, chunk_rows, stats))
+    queries, calls = codec.encode_calls(queries_df)
+
+    best = TopK(len(queries), k)
+    pool_rows = np.empty(0, dtype=np.int64)
+    pool_ids = np.empty(0, dtype=object)
+    pool_codes = np.empty((0, len(loci), 2), dtype=np.uint8)
+    pool_overflow = Overflow.empty()  # Entries by database row, not pool position
+
+    offset = 0
+    reader = pd.read_csv(database_path, chunksize=chunk_rows)
+    while True:
+        with stats.stage("csv_parse"):
+            chunk_df = next(reader, None)
+        if chunk_df is None:
+            break
+        with stats.stage("encode"):
+            codes, overflow = codec.encode_calls(chunk_df)
+            chunk = codec.with_rows(chunk_df["PersonID"].astype(str).to_numpy(dtype=object), codes, overflow)
+        # Room for overflow rows that merge_overflow takes out and rescores
+        slack = OVERFLOW_SLACK if len(overflow) else 0
+        found = search(chunk, queries, k + slack, model=model, stats=stats)
+        found = merge_overflow(chunk, queries, calls, found, model, stats)
+        found.rows[found.rows >= 0] += offset
+        best.merge(found)
+
+        # Keep PersonIDs, codes and overflow only for rows still ranked by some query
+        ranked = np.unique(best.rows[best.rows >= 0])
+        new = ranked[ranked >= offset]
+        pool_rows = np.concatenate([pool_rows, new])
+        pool_ids = np.concatenate([pool_ids, chunk.person_ids[new - offset]])
+        pool_codes = np.concatenate([pool_codes, chunk.codes[new - offset]])
+        pool_overflow = Overflow.concat([pool_overflow, overflow], [0, offset])
+        keep = np.isin(pool_rows, ranked)
+        pool_rows, pool_ids, pool_codes = pool_rows[keep], pool_ids[keep], pool_codes[keep]
+        pool_overflow = _entries(pool_overflow, np.isin(pool_overflow.rows, ranked))
+        offset += len(chunk_df)
+
+    # Point the ranking at pool positions (pool_rows is ascending)
+    valid = best.rows >= 0
+    best.rows[valid] = np.searchsorted(pool_rows, best.rows[valid])
+    pool_overflow = Overflow(
+        np.searchsorted(pool_rows, pool_overflow.rows), pool_overflow.loci, pool_overflow.alleles, pool_overflow.nulls
+    )
+    pool = codec.with_rows(pool_ids, pool_codes, pool_overflow)
+    return pool, queries, calls, best, LikelihoodModel(pool, model.frequencies)
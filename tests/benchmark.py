@@ -0,0 +1,163 @@
+# tests/benchmark.py
+"""
+Scaling benchmark: sweeps database size and query count and times each
+stage separately (CSV load, encode, index build, cached load, scoring).
+Writes machine-readable results so runs can be compared across commits.
+
+Scoring is timed on the paths that serve requests, with the database
+frequencies model built once: the batch as find_matches ranks it
+(search_grouped), and per-query latency as match_single answers one
+query (search_pruned). The lossy allele-index pre-filter
+(search_indexed), opt-in only, gets a latency column of its own.
+
+Usage:
+    uv run tests/benchmark.py [--sizes 10000,100000,1000000]
+                              [--queries 1,100,1000] [--seed 0]
+                              [--data-dir data/bench] [--output bench_results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.cache import load_database
+from codechallenge2025.dataset_generator import generate_dataset
+from codechallenge2025.encoding import GenotypeStore
+from codechallenge2025.dedup import GenotypeGroups, search_grouped
+from codechallenge2025.frequencies import load_frequencies
+from codechallenge2025.index import AlleleIndex, search_indexed
+from codechallenge2025.likelihood import IDENTITY_SLACK, TOP_K, LikelihoodModel
+from codechallenge2025.pruning import search_pruned
+
+LATENCY_SAMPLE = 200  # Queries timed one by one for the latency percentiles
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def dataset(data_dir, size, num_queries, seed):
+    """Paths of a generated dataset, reused when already on disk"""
+    out_dir = os.path.join(data_dir, f"{size}-q{num_queries}-s{seed}")
+    db_path = os.path.join(out_dir, "str_database.csv")
+    query_path = os.path.join(out_dir, "str_queries.csv")
+    if not (os.path.exists(db_path) and os.path.exists(query_path)):
+        generate_dataset(out_dir, size, num_queries, min(35, num_queries), seed)
+    return db_path, query_path
+
+
+def bench_size(data_dir, size, query_counts, seed):
+    """Stage timings for one database size and every query count"""
+    db_path, query_path = dataset(data_dir, size, max(query_counts), seed)
+
+    database_df, load_s = timed(pd.read_csv, db_path)
+    store, encode_s = timed(GenotypeStore.from_dataframe, database_df)
+    del database_df
+    index, index_s = timed(AlleleIndex, store)
+    load_database(db_path)  # make sure the binary cache exists
+    (store, index), cache_load_s = timed(load_database, db_path)
+    # Scored as find_matches does: cached store, database frequencies, genotype groups
+    model = LikelihoodModel(store, load_frequencies(db_path, store))
+    groups = GenotypeGroups(store)
+    queries = store.encode(pd.read_csv(query_path))
+    k = TOP_K + IDENTITY_SLACK
+
+    rows = []
+    for n_queries in query_counts:
+        batch = queries[:n_queries]
+        _, batch_s = timed(search_grouped, store, groups, batch, k, model=model)
+
+        latencies, index_latencies = [], []
+        for i in range(min(n_queries, LATENCY_SAMPLE)):
+            _, seconds = timed(search_pruned, store, batch[i:i + 1], k, model=model)
+            latencies.append(seconds)
+            _, seconds = timed(search_indexed, store, index, batch[i:i + 1], k, model=model, groups=groups)
+            index_latencies.append(seconds)
+        latencies = np.array(latencies) * 1000
+        index_latencies = np.array(index_latencies) * 1000
+        row = {
+            "db_size": size,
+            "queries": n_queries,
+            "load_s": round(load_s, 4),
+            "encode_s": round(encode_s, 4),
+            "index_s": round(index_s, 4),
+            "cache_load_s": round(cache_load_s, 4),
+            "batch_score_s": round(batch_s, 4),
+            "batch_pairs_per_s": round(n_queries * size / batch_s),
+            "latency_ms": {
+                f"p{p}": round(float(np.percentile(latencies, p)), 3) for p in (50, 95, 99)
+            },
+            "profiles_per_s": round(size / (np.median(latencies) / 1000)),
+            "index_latency_ms": {
+                f"p{p}": round(float(np.percentile(index_latencies, p)), 3) for p in (50, 95, 99)
+            },
+        }
+        print(
+            f"  {size:>10,} profiles × {n_queries:>6,} queries: "
+            f"batch {batch_s:8.3f}s ({row['batch_pairs_per_s']:,} pairs/s), "
+            f"latency p50/p95/p99 {row['latency_ms']['p50']:.1f}/"
+            f"{row['latency_ms']['p95']:.1f}/{row['latency_ms']['p99']:.1f} ms "
+            f"(index pre-filter {row['index_latency_ms']['p50']:.1f}/"
+            f"{row['index_latency_ms']['p95']:.1f}/{row['index_latency_ms']['p99']:.1f} ms)"
+        )
+        rows.append(row)
+    print(
+        f"  {size:>10,} profiles: load {load_s:.2f}s, encode {encode_s:.2f}s, "
+        f"index {index_s:.2f}s, cached load {cache_load_s:.3f}s"
+    )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for #codechallenge2025")
+    parser.add_argument("--sizes", default="10000,100000,500000", help="comma-separated database sizes")
+    parser.add_argument("--queries", default="1,10,100,1000", help="comma-separated query counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="data/bench")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    query_counts = sorted(int(q) for q in args.queries.split(","))
+
+    print("=== #codechallenge2025 Scaling Benchmark ===")
+    results = []
+    for size in sizes:
+        results.extend(bench_size(args.data_dir, size, query_counts, args.seed))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
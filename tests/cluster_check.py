@@ -0,0 +1,103 @@
+# tests/cluster_check.py
+"""
+Scatter-gather check with local worker processes.
+
+Splits a database into parts, starts one `codechallenge2025 worker`
+process per part, and compares the coordinator's results with a
+single-machine MatchService over the whole database (same top-10 IDs,
+same CLRs). It
+then freezes one worker (SIGSTOP) and checks that the coordinator still
+answers within its timeout, with every result flagged incomplete.
+
+Usage:
+    uv run tests/cluster_check.py [--database data/str_database.csv]
+                                  [--queries data/str_queries.csv]
+                                  [--workers 3] [--port 8770]
+"""
+
+import argparse
+import math
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from codechallenge2025.cache import load_database
+from codechallenge2025.cluster import Coordinator, partition_database
+from codechallenge2025.server import MatchService
+from codechallenge2025.stats import Stats
+
+
+def wait_for_port(port: int, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"worker on port {port} did not start")
+
+
+def same(a, b) -> bool:
+    ids = [c["person_id"] for c in a] == [c["person_id"] for c in b]
+    return ids and all(math.isclose(x["clr"], y["clr"], rel_tol=1e-4) for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scatter-gather check for #codechallenge2025")
+    parser.add_argument("--database", default="data/str_database.csv")
+    parser.add_argument("--queries", default="data/str_queries.csv")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        paths = partition_database(args.database, args.workers, out_dir)
+        ports = [args.port + i for i in range(args.workers)]
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-c", "from codechallenge2025.cli import main; main()",
+                 "worker", "--database", path, "--port", str(port)],
+                stdout=subprocess.DEVNULL,
+            )
+            for path, port in zip(paths, ports)
+        ]
+        try:
+            for port in ports:
+                wait_for_port(port)
+            workers = [f"127.0.0.1:{port}" for port in ports]
+
+            start = time.perf_counter()
+            stats = Stats()
+            results = Coordinator(workers).find_matches(args.queries, stats=stats)
+            elapsed = time.perf_counter() - start
+            store, _ = load_database(args.database)
+            service = MatchService(store, database_path=args.database)
+            profiles = pd.read_csv(args.queries, dtype=str, keep_default_na=False).to_dict("records")
+            reference = service.match_batch(profiles)
+            service.executor.shutdown()
+            agree = sum(same(a["top_candidates"], b) for a, b in zip(results, reference))
+            print(f"=== {args.workers} workers: {elapsed:.2f} s, {agree}/{len(results)} results as on one machine ===")
+            print("\n".join(stats.lines()))
+
+            procs[-1].send_signal(signal.SIGSTOP)
+            stats = Stats()
+            start = time.perf_counter()
+            results = Coordinator(workers, timeout=5).find_matches(args.queries, stats=stats)
+            elapsed = time.perf_counter() - start
+            partial = sum(r.get("complete") is False for r in results)
+            print(f"=== One worker frozen: {elapsed:.2f} s, {partial}/{len(results)} results flagged incomplete ===")
+            print("\n".join(stats.lines()))
+        finally:
+            for proc in procs:
+                proc.kill()
+                proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# tests/exactness_check.py
+"""
+Regression check of the exactness claims between search paths.
+
+Generates a small seeded dataset and asserts that the paths documented
+as giving the same answer do:
+
+  - search_pruned: same top-k rows and scores as exhaustive scoring.search
+  - search_grouped: same top-k scores, and the same rows up to exactly
+    tied scores
+  - parallel_search: same top-k rows and scores as one process
+  - cascade_candidates: same rows as AlleleIndex.candidates with every
+    locus probed, with and without ±1-step neighbours
+  - stream_search (small chunks): same top 10 IDs and CLRs as scoring the
+    whole database in memory
+  - locus reports: each candidate's per-locus LRs multiply to its CLR
+
+Every check runs; the script exits non-zero if any fails.
+
+Usage:
+    uv run tests/exactness_check.py [--profiles 3000] [--queries 40]
+                                    [--pairs 25] [--seed 7] [--workers 2]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.bitsets import AlleleBitsets
+from codechallenge2025.cache import load_database
+from codechallenge2025.cascade import cascade_candidates, locus_order
+from codechallenge2025.dataset_generator import generate_dataset
+from codechallenge2025.dedup import GenotypeGroups, search_grouped
+from codechallenge2025.frequencies import estimate_frequencies
+from codechallenge2025.index import MAX_MISMATCH, StepNeighbours
+from codechallenge2025.likelihood import IDENTITY_SLACK, TOP_K, LikelihoodModel, candidates
+from codechallenge2025.parallel import parallel_search
+from codechallenge2025.participant_solution import find_matches
+from codechallenge2025.pruning import search_pruned
+from codechallenge2025.scoring import search
+from codechallenge2025.streaming import stream_search
+
+K = TOP_K + IDENTITY_SLACK
+RTOL = 1e-4  # float32 scores summed in different orders
+
+
+def same_topk(found, reference, label: str, ties: bool = False):
+    """Assert two TopK agree per query (ties: rows may differ among exactly tied scores)"""
+    for i, ((rows, scores), (ref_rows, ref_scores)) in enumerate(zip(found.results(), reference.results())):
+        assert np.allclose(scores, ref_scores, rtol=RTOL), f"{label}: query {i} scores differ"
+        if not ties:
+            assert np.array_equal(rows, ref_rows), f"{label}: query {i} rows differ"
+            continue
+        # Rows strictly above the k-th score are in both lists whatever the tie order
+        above = ref_scores > ref_scores[-1]
+        assert set(rows[scores > scores[-1]]) == set(ref_rows[above]), f"{label}: query {i} rows differ"
+
+
+def check_pruned(store, queries, model, reference):
+    same_topk(search_pruned(store, queries, K, model=model), reference, "search_pruned")
+
+
+def check_grouped(store, queries, model, reference):
+    same_topk(search_grouped(store, GenotypeGroups(store), queries, K, model=model), reference, "search_grouped", True)
+
+
+def check_parallel(store, queries, model, reference, workers: int):
+    same_topk(parallel_search(store, queries, K, workers=workers, model=model), reference, "parallel_search")
+
+
+def check_cascade(store, index, queries, model):
+    bitsets = AlleleBitsets(store)
+    neighbours = StepNeighbours(store)
+    for expand in (False, True):
+        for i, query in enumerate(queries):
+            steps = neighbours.query(query) if expand else None
+            want = index.candidates(query, MAX_MISMATCH, probe_loci=None, steps=steps)
+            got = cascade_candidates(bitsets, query, locus_order(model, query), MAX_MISMATCH, neighbours=expand)
+            assert np.array_equal(got, want), f"cascade (neighbours={expand}): query {i} candidates differ"
+
+
+def check_stream(db_path, queries_df, store, model, chunk_rows: int):
+    pool, pool_queries, _, best, _ = stream_search(db_path, queries_df, K, chunk_rows=chunk_rows)
+    reference = search(store, store.encode(queries_df), K, model=model)
+    for i, ((rows, scores), (ref_rows, ref_scores)) in enumerate(zip(best.results(), reference.results())):
+        got = candidates(pool, pool_queries[i], rows, scores)[:TOP_K]
+        want = candidates(store, store.encode(queries_df.iloc[i:i + 1])[0], ref_rows, ref_scores)[:TOP_K]
+        assert [c["person_id"] for c in got] == [c["person_id"] for c in want], f"stream: query {i} IDs differ"
+        assert all(
+            math.isclose(a["clr"], b["clr"], rel_tol=RTOL) for a, b in zip(got, want)
+        ), f"stream: query {i} CLRs differ"
+
+
+def check_reports(db_path, queries_path, report_dir):
+    results = find_matches(db_path, queries_path, use_cache=False, report_dir=report_dir, report_formats=["json"])
+    for result in results:
+        with open(os.path.join(report_dir, f"{result['query_id']}.json")) as f:
+            report = json.load(f)
+        for cand in report["candidates"]:
+            product = math.exp(sum(math.log(locus["lr"]) for locus in cand["loci"]))
+            assert math.isclose(product, cand["clr"], rel_tol=RTOL), (
+                f"report {result['query_id']}: {cand['person_id']} locus LRs give {product:.6g}, CLR {cand['clr']:.6g}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exactness regression check for #codechallenge2025")
+    parser.add_argument("--profiles", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--pairs", type=int, default=25, help="planted parent-child pairs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=2, help="processes for parallel_search")
+    parser.add_argument("--chunk-rows", type=int, default=700, help="stream_search chunk size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        generate_dataset(out_dir, args.profiles, args.queries, args.pairs, args.seed)
+        db_path = os.path.join(out_dir, "str_database.csv")
+        queries_path = os.path.join(out_dir, "str_queries.csv")
+        store, index = load_database(db_path, use_cache=False)
+        model = LikelihoodModel(store, estimate_frequencies(store))
+        queries_df = pd.read_csv(queries_path)
+        queries = store.encode(queries_df)
+        reference = search(store, queries, K, model=model)
+
+        checks = [
+            ("search_pruned == search", lambda: check_pruned(store, queries, model, reference)),
+            ("search_grouped == search", lambda: check_grouped(store, queries, model, reference)),
+            ("parallel_search == search", lambda: check_parallel(store, queries, model, reference, args.workers)),
+            ("cascade == index (all loci)", lambda: check_cascade(store, index, queries, model)),
+            ("stream == in memory", lambda: check_stream(db_path, queries_df, store, model, args.chunk_rows)),
+            ("locus LRs multiply to CLR", lambda: check_reports(db_path, queries_path, os.path.join(out_dir, "r"))),
+        ]
+        print(f"=== Exactness: {len(store):,} profiles, {len(queries)} queries, seed {args.seed} ===")
+        failed = 0
+        for name, check in checks:
+            try:
+                check()
+                print(f"ok    {name}")
+            except AssertionError:
+                failed += 1
+                print(f"FAIL  {name}")
+                traceback.print_exc()
+    print(f"{len(checks) - failed}/{len(checks)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# tests/neighbour_recall.py
+"""
+Pre-filter recall with and without ±1-step neighbour expansion.
+
+Generates a dataset in which every query is a planted child, then for
+each max_mismatch reports how often the true parent survives the
+AlleleIndex pre-filter (candidate recall), the mean candidate-set size
+and the pre-filter time per query, with and without neighbour keys.
+
+Usage:
+    uv run tests/neighbour_recall.py [--profiles 20000] [--pairs 1000]
+                                     [--seed 0] [--data-dir data/bench]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from codechallenge2025.cache import load_database
+from codechallenge2025.dataset_generator import generate_dataset
+from codechallenge2025.index import MAX_MISMATCH, StepNeighbours
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neighbour-key recall measurement for #codechallenge2025")
+    parser.add_argument("--profiles", type=int, default=20000)
+    parser.add_argument("--pairs", type=int, default=1000, help="planted pairs (one query each)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="data/bench")
+    args = parser.parse_args()
+
+    out_dir = os.path.join(args.data_dir, f"neighbours-{args.profiles}-p{args.pairs}-s{args.seed}")
+    db_path = os.path.join(out_dir, "str_database.csv")
+    if not os.path.exists(db_path):
+        generate_dataset(out_dir, args.profiles, args.pairs, args.pairs, args.seed)
+    store, index = load_database(db_path)
+    queries_df = pd.read_csv(os.path.join(out_dir, "str_queries.csv"))
+    truth = pd.read_csv(os.path.join(out_dir, "ground_truth.csv"))
+    parent = dict(zip(truth["QueryID"], truth["TrueCounterpartID"]))
+    row_of = {pid: row for row, pid in enumerate(store.person_ids)}
+    targets = np.array([row_of[parent[q]] for q in queries_df["PersonID"]])
+    queries = store.encode(queries_df)
+    neighbours = StepNeighbours(store)
+
+    print(f"=== Neighbour expansion: {len(store):,} profiles, {len(queries):,} planted queries ===")
+    print(f"{'mismatch':>8} {'neighbours':>10} {'recall':>8} {'candidates':>11} {'ms/query':>9}")
+    for max_mismatch in range(MAX_MISMATCH + 1):
+        for expand in (False, True):
+            found, sizes = 0, 0
+            start = time.perf_counter()
+            for query, target in zip(queries, targets):
+                steps = neighbours.query(query) if expand else None
+                rows = index.candidates(query, max_mismatch, steps=steps)
+                sizes += len(rows)
+                found += target in rows[np.searchsorted(rows, target):][:1]
+            ms = (time.perf_counter() - start) * 1000 / len(queries)
+            print(
+                f"{max_mismatch:>8} {'on' if expand else 'off':>10} {found / len(queries):>8.1%} "
+                f"{sizes / len(queries):>11,.0f} {ms:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
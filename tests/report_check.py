@@ -0,0 +1,68 @@
+# tests/report_check.py
+"""
+Report file naming check.
+
+Generates a small seeded dataset, rewrites its query IDs so that several
+collide once sanitized into file names ('Q/1' and 'Q_1') or repeat
+outright, runs find_matches with report_dir and checks that every
+result gets report files of its own: one per query and format, each
+holding the query ID it was written for. The script exits non-zero if
+any report is missing or overwritten.
+
+Usage:
+    uv run tests/report_check.py [--profiles 2000] [--seed 7]
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from codechallenge2025.dataset_generator import generate_dataset
+from codechallenge2025.participant_solution import find_matches
+from codechallenge2025.reports import REPORT_FORMATS
+
+QUERY_IDS = ["Q_1", "Q/1", "q_1", "Q_1", "Q 2"]  # Sanitize to Q_1 (x4, ignoring case) and Q_2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report naming check for #codechallenge2025")
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        generate_dataset(out_dir, args.profiles, len(QUERY_IDS), 2, args.seed)
+        queries_path = os.path.join(out_dir, "str_queries.csv")
+        queries_df = pd.read_csv(queries_path)
+        queries_df["PersonID"] = QUERY_IDS
+        queries_df.to_csv(queries_path, index=False)
+        report_dir = os.path.join(out_dir, "reports")
+        find_matches(
+            os.path.join(out_dir, "str_database.csv"), queries_path, result_cache=False, report_dir=report_dir
+        )
+        files = sorted(os.listdir(report_dir))
+        written = collections.Counter()
+        for name in files:
+            if name.endswith(".json"):
+                with open(os.path.join(report_dir, name)) as f:
+                    written[json.load(f)["query_id"]] += 1
+
+    print(f"=== Reports for query IDs {QUERY_IDS} ===")
+    print("\n".join(files))
+    failed = []
+    if len(files) != len(QUERY_IDS) * len(REPORT_FORMATS):
+        failed.append(f"{len(files)} report files, expected {len(QUERY_IDS) * len(REPORT_FORMATS)}")
+    if written != collections.Counter(QUERY_IDS):
+        failed.append(f"JSON reports per query ID {dict(written)}")
+    for message in failed:
+        print(f"FAIL  {message}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
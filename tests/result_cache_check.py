@@ -0,0 +1,60 @@
+# tests/result_cache_check.py
+"""
+Result-cache check across matching modes.
+
+Generates a small seeded dataset and runs find_matches over it in
+turn: exhaustive, indexed, exhaustive again, then sharded over worker
+processes. Modes keep their entries side by side, so the indexed run
+must not evict the exhaustive entries: the third and fourth runs must
+hit the cache for every query and return the first run's results.
+The script exits non-zero if they do not.
+
+Usage:
+    uv run tests/result_cache_check.py [--profiles 3000] [--queries 40]
+                                       [--pairs 25] [--seed 7]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from codechallenge2025.dataset_generator import generate_dataset
+from codechallenge2025.participant_solution import find_matches
+from codechallenge2025.stats import Stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result-cache mode check for #codechallenge2025")
+    parser.add_argument("--profiles", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--pairs", type=int, default=25, help="planted parent-child pairs")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        generate_dataset(out_dir, args.profiles, args.queries, args.pairs, args.seed)
+        db_path = os.path.join(out_dir, "str_database.csv")
+        queries_path = os.path.join(out_dir, "str_queries.csv")
+        runs = [("exhaustive", {}), ("indexed", {"indexed": True}), ("exhaustive", {}), ("workers=2", {"workers": 2})]
+        hits, results = [], []
+        for _, kwargs in runs:
+            stats = Stats()
+            results.append(find_matches(db_path, queries_path, stats=stats, **kwargs))
+            hits.append(stats.counters.get("result_cache_hits", 0))
+
+    print(f"=== Result cache: {args.queries} queries per run ===")
+    for (name, _), count in zip(runs, hits):
+        print(f"{name:<12} {count:>4} hits")
+    failed = []
+    if hits[2] != args.queries or hits[3] != args.queries:
+        failed.append("exhaustive entries did not survive the indexed run")
+    if results[2] != results[0] or results[3] != results[0]:
+        failed.append("cached results differ from the first run")
+    for message in failed:
+        print(f"FAIL  {message}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,15 @@ Works locally and in GitHub Actions.
 """
 
 import os
+import json
 import time
+import inspect
 import pandas as pd
 import importlib.util
 import sys
 
+from codechallenge2025.stats import Stats
+
 
 def load_participant():
     """Dynamically load the participant_solution module"""
@@ -62,10 +66,21 @@ def main():
     db_path = "data/str_database.csv"
     queries_path = "data/str_queries.csv"
 
+    # Stage timers and counters: on unless CHALLENGE_STATS=0, and only for
+    # solutions whose find_matches accepts a stats argument
+    stats = None
+    if os.environ.get("CHALLENGE_STATS", "1") != "0" and (
+        "stats" in inspect.signature(participant.find_matches).parameters
+    ):
+        stats = Stats()
+
     # Run matching
     print("Running find_matches()...")
     start_time = time.time()
-    results = participant.find_matches(db_path, queries_path)
+    if stats is not None:
+        results = participant.find_matches(db_path, queries_path, stats=stats)
+    else:
+        results = participant.find_matches(db_path, queries_path)
     duration = time.time() - start_time
 
     # Evaluate
@@ -88,6 +103,12 @@ def main():
     print(f"Accuracy       : {accuracy:.1%}")
     print(f"Speed bonus    : +{speed_bonus}")
     print(f"Final score    : {final_score:.1f}/120")
+    if stats is not None:
+        print("\n=== STAGES ===")
+        for name, seconds in sorted(stats.seconds.items(), key=lambda kv: -kv[1]):
+            print(f"{name:<15}: {seconds:.3f} s")
+        for name, value in stats.counters.items():
+            print(f"{name:<15}: {value:,}")
 
     # Save results for leaderboard (local + CI compatible)
     output_file = "test_results.txt"
@@ -96,6 +117,15 @@ def main():
         print(f"accuracy={accuracy:.6f}", file=f)
         print(f"correct={correct}", file=f)
         print(f"score={final_score:.1f}", file=f)
+        if stats is not None:
+            for line in stats.lines():
+                print(line, file=f)
+
+    # Optional full stats (overall and per query) as JSON
+    stats_json = os.environ.get("CHALLENGE_STATS_JSON")
+    if stats is not None and stats_json:
+        with open(stats_json, "w") as f:
+            json.dump(stats.to_dict(), f, indent=2)
 
     # Also write to GITHUB_OUTPUT if in CI
     github_output = os.environ.get("GITHUB_OUTPUT")
@@ -0,0 +1,193 @@
+# tests/tune.py
+"""
+Recall-versus-speed sweep of the pre-filter tuning parameters.
+
+Generates (or reuses) a dataset with known ground truth and ranks its
+queries under every setting of the pruning knobs:
+
+  - index: max_mismatch × probe_loci (rarest loci probed) × neighbours
+  - cascade: max_mismatch × neighbours (the depth at which rows drop out)
+  - anytime: budget_rows (candidates scored per query, best first)
+  - exhaustive: every row scored, the reference
+
+For each setting it records top-1 and top-10 recall of the true parent
+(planted queries only), how often the top 10 equals the exhaustive one,
+rows scored per query and wall time per query. Settings that no other
+setting beats on time and both recalls at once form the Pareto frontier,
+marked with * and saved with the results.
+
+By default every setting gets all queries in one call, as find_matches
+does, so exhaustive scoring is amortized over the batch. With
+--one-at-a-time each query is ranked on its own call, which gives the
+latency a service answering single queries sees.
+
+Usage:
+    uv run tests/tune.py [--profiles 50000] [--pairs 200] [--negatives 50]
+                         [--seed 0] [--data-dir data/bench]
+                         [--max-mismatch 0,1,2,3,4,6] [--probe-loci all,8,12]
+                         [--budget-rows 256,1024,4096] [--one-at-a-time]
+                         [--output tune_results.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from codechallenge2025.anytime import search_anytime
+from codechallenge2025.bitsets import AlleleBitsets
+from codechallenge2025.cache import load_database
+from codechallenge2025.cascade import search_cascade
+from codechallenge2025.dataset_generator import generate_dataset
+from codechallenge2025.dedup import GenotypeGroups
+from codechallenge2025.frequencies import load_frequencies
+from codechallenge2025.index import search_indexed
+from codechallenge2025.likelihood import IDENTITY_SLACK, TOP_K, LikelihoodModel, candidates
+from codechallenge2025.scoring import search
+from codechallenge2025.stats import Stats
+
+
+def dataset(data_dir, profiles, pairs, negatives, seed):
+    """Paths of a generated dataset, reused when already on disk"""
+    out_dir = os.path.join(data_dir, f"tune-{profiles}-p{pairs}-n{negatives}-s{seed}")
+    if not os.path.exists(os.path.join(out_dir, "ground_truth.csv")):
+        generate_dataset(out_dir, profiles, pairs + negatives, pairs, seed)
+    return out_dir
+
+
+def pareto(rows):
+    """Flag the rows no other row matches or beats on time and both recalls, better on one"""
+    for row in rows:
+        row["pareto"] = not any(
+            other["ms_per_query"] <= row["ms_per_query"]
+            and other["top1_recall"] >= row["top1_recall"]
+            and other["top10_recall"] >= row["top10_recall"]
+            and (
+                other["ms_per_query"] < row["ms_per_query"]
+                or other["top1_recall"] > row["top1_recall"]
+                or other["top10_recall"] > row["top10_recall"]
+            )
+            for other in rows
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-filter tuning sweep for #codechallenge2025")
+    parser.add_argument("--profiles", type=int, default=50000)
+    parser.add_argument("--pairs", type=int, default=200, help="planted parent-child pairs (one query each)")
+    parser.add_argument("--negatives", type=int, default=50, help="unrelated control queries")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="data/bench")
+    parser.add_argument("--max-mismatch", default="0,1,2,3,4,6")
+    parser.add_argument("--probe-loci", default="all,8,12", help="'all' or a number of rarest loci")
+    parser.add_argument("--budget-rows", default="256,1024,4096", help="anytime row budgets")
+    parser.add_argument("--one-at-a-time", action="store_true", help="rank each query on its own call")
+    parser.add_argument("--output", default="tune_results.json")
+    args = parser.parse_args()
+
+    out_dir = dataset(args.data_dir, args.profiles, args.pairs, args.negatives, args.seed)
+    db_path = os.path.join(out_dir, "str_database.csv")
+    store, index = load_database(db_path)
+    model = LikelihoodModel(store, load_frequencies(db_path, store))
+    groups = GenotypeGroups(store)
+    bitsets = AlleleBitsets(store)
+    queries_df = pd.read_csv(os.path.join(out_dir, "str_queries.csv"))
+    truth = pd.read_csv(os.path.join(out_dir, "ground_truth.csv"))
+    parent = dict(zip(truth["QueryID"], truth["TrueCounterpartID"]))
+    queries = store.encode(queries_df)
+    planted = [parent.get(q) for q in queries_df["PersonID"]]
+    k = TOP_K + IDENTITY_SLACK
+
+    mismatches = [int(m) for m in args.max_mismatch.split(",")]
+    probes = [None if p == "all" else int(p) for p in args.probe_loci.split(",")]
+    settings = [("exhaustive", {}, lambda batch, stats: search(store, batch, k, model=model, stats=stats))]
+    for m, probe, nb in itertools.product(mismatches, probes, (False, True)):
+        settings.append((
+            "index",
+            {"max_mismatch": m, "probe_loci": probe, "neighbours": nb},
+            lambda batch, stats, m=m, probe=probe, nb=nb: search_indexed(
+                store, index, batch, k, m, probe, model=model, stats=stats, groups=groups, neighbours=nb
+            ),
+        ))
+    for m, nb in itertools.product(mismatches, (False, True)):
+        settings.append((
+            "cascade",
+            {"max_mismatch": m, "neighbours": nb},
+            lambda batch, stats, m=m, nb=nb: search_cascade(
+                store, bitsets, batch, k, m, model=model, stats=stats, neighbours=nb
+            ),
+        ))
+    for budget in (int(b) for b in args.budget_rows.split(",")):
+        settings.append((
+            "anytime",
+            {"budget_rows": budget},
+            lambda batch, stats, budget=budget: search_anytime(
+                store, index, batch, k, budget_rows=budget, model=model, stats=stats
+            )[0],
+        ))
+
+    mode = "one at a time" if args.one_at_a_time else "batched"
+    print(f"=== Tuning sweep: {len(store):,} profiles, {len(queries)} queries ({args.pairs} planted), {mode} ===")
+    print(f"{'method':<10} {'setting':<48} {'top1':>6} {'top10':>6} {'exact':>6} {'rows/q':>9} {'ms/q':>8}")
+    results, reference = [], None
+    for method, params, run in settings:
+        stats = Stats()
+        start = time.perf_counter()
+        if args.one_at_a_time:
+            found = [pair for i in range(len(queries)) for pair in run(queries[i:i + 1], stats).results()]
+        else:
+            found = run(queries, stats).results()
+        seconds = time.perf_counter() - start
+        ranked = [
+            [c["person_id"] for c in candidates(store, query, rows, scores)]
+            for query, (rows, scores) in zip(queries, found)
+        ]
+        reference = reference or ranked
+        top1 = sum(bool(ids) and ids[0] == p for ids, p in zip(ranked, planted) if p)
+        top10 = sum(p in ids for ids, p in zip(ranked, planted) if p)
+        scored = stats.counters.get("candidates", len(store) * len(queries)) - stats.counters.get("rows_unscored", 0)
+        setting = ", ".join(f"{key}={value}" for key, value in params.items()) or "-"
+        row = {
+            "method": method,
+            "setting": setting,
+            **params,
+            "top1_recall": round(top1 / args.pairs, 4),
+            "top10_recall": round(top10 / args.pairs, 4),
+            "exact_top10": round(sum(a == b for a, b in zip(ranked, reference)) / len(queries), 4),
+            "rows_per_query": round(scored / len(queries), 1),
+            "ms_per_query": round(seconds * 1000 / len(queries), 3),
+        }
+        results.append(row)
+        print(
+            f"{method:<10} {setting:<48} {row['top1_recall']:>6.1%} {row['top10_recall']:>6.1%} "
+            f"{row['exact_top10']:>6.1%} {row['rows_per_query']:>9,.0f} {row['ms_per_query']:>8.2f}"
+        )
+
+    pareto(results)
+    print("\nPareto frontier (time vs top-1 and top-10 recall):")
+    for row in sorted((r for r in results if r["pareto"]), key=lambda r: r["ms_per_query"]):
+        print(
+            f"* {row['method']:<10} {row['setting']:<48} top1 {row['top1_recall']:.1%}, "
+            f"top10 {row['top10_recall']:.1%}, {row['ms_per_query']:.2f} ms/query"
+        )
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "profiles": len(store),
+        "queries": len(queries),
+        "planted": args.pairs,
+        "seed": args.seed,
+        "one_at_a_time": args.one_at_a_time,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()